@@ -0,0 +1,99 @@
+import threading
+import traceback
+from utils.latest_value import LatestValue
+from utils.rate_control import RateScheduler
+
+
+class CollectionEngine:
+    def __init__(self, create_task, get_action, record_step, control_hz=20):
+        """
+        Step a task on a worker thread at a fixed control rate.
+
+        The task is created, reset, stepped and rendered on the worker, so
+        MuJoCo stepping and offscreen rendering keep their rendering context
+        on one thread and never run in the Tk main loop. After every step the
+        frame is published to `latest`, which the GUI polls at its own rate.
+
+        Parameters
+        ----------
+        create_task : callable
+            Returns the task to step, already reset, and the state its reset
+            returned. Called on the worker thread.
+        get_action : callable
+            Returns the current key state, e.g. `InputHandler.get_action`.
+        record_step : callable
+            Called on the worker thread with every step to record, including
+            its ``timestamp`` in seconds since the episode started.
+        control_hz : float, optional
+            The stepping rate, by default 20.
+        """
+        self.create_task = create_task
+        self.get_action = get_action
+        self.record_step = record_step
+        self.rate = RateScheduler(control_hz)
+        self.latest = LatestValue()
+        self.task = None
+        self.error = None
+        self.paused = False
+        self.done = False
+        self.ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="CollectionEngine", daemon=True)
+
+    def start(self):
+        """Start the worker thread."""
+        self._thread.start()
+
+    def stop(self, wait=True):
+        """
+        Stop stepping.
+
+        Parameters
+        ----------
+        wait : bool, optional
+            If True, wait for the step in progress to finish, by default
+            True. The Tk thread passes False and polls `running` instead.
+        """
+        self._stop.set()
+        if wait and self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    @property
+    def running(self):
+        """True while the worker thread is alive."""
+        return self._thread.is_alive()
+
+    def _record(self, step):
+        self.record_step(dict(step, timestamp=self.rate.elapsed()))
+        self.latest.publish(step["observation"])
+
+    def _run(self):
+        try:
+            self.task, state = self.create_task()
+            frame = self.task.render()
+            self.rate.start()
+            self._record({"state": state, "observation": frame})
+            self.ready.set()
+            while not self._stop.wait(self.rate.tick()):
+                if self.paused:
+                    continue
+                action = self.get_action()
+                (state, reward, terminated, truncated, info), action = self.task.step(action)
+                done = terminated or truncated
+                frame = self.task.render()
+                self._record({"state": state, "action": action, "reward": reward,
+                              "done": done, "observation": frame})
+                if done:
+                    self.done = True
+                    break
+        except Exception as e:
+            traceback.print_exc()
+            self.error = e
+        finally:
+            if self.task is not None:
+                # The next episode may step the task on another thread.
+                try:
+                    self.task.deactivate()
+                except Exception:
+                    traceback.print_exc()
+            self.ready.set()
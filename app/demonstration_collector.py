@@ -1,15 +1,22 @@
 import gc
+import time
+import queue
 import tkinter as tk
 from tkinter import ttk
 from tkinter import ttk, messagebox
-from PIL import Image, ImageTk
 from utils.input_handler import InputHandler
-from utils.tools import resize_and_pad_to_square
+from utils.episode_buffer import EpisodeBuffer
+from app.collection_engine import CollectionEngine
+from app.env_process import EnvWorkerError
+from utils.save_queue import SaveQueue
+from utils.display import CanvasImage, FrameCompositor, DisplayThrottle
 
 
 class DemonstrationCollector:
     def __init__(self, master, env_combobox, task_combobox, 
-                 env_manager, data_manager, demo_listbox, task_info_text):
+                 env_manager, data_manager, demo_listbox, task_info_text, streaming=True,
+                 on_saved=None, max_pending_saves=4, memory_budget_mb=4096, control_hz=20, display_hz=30,
+                 prewarm=True, collection_plan=None):
         """
         Constructor for DemonstrationCollector class.
 
@@ -29,13 +36,41 @@ class DemonstrationCollector:
             The listbox that displays the list of available demonstrations.
         task_info_text : tk.Text
             The text box that displays the information of the current task.
+        streaming : bool, optional
+            If True, steps are streamed to disk by an episode writer while
+            recording instead of being kept in memory until saved, by default True
+        on_saved : callable, optional
+            Called with the demo id on the Tk thread once a save has finished.
+        max_pending_saves : int, optional
+            The maximum number of demonstrations waiting to be written in the
+            background, by default 4.
+        memory_budget_mb : float, optional
+            The memory an in-memory episode may take before its steps are
+            spilled to memory-mapped temporary files, by default 4096. None
+            disables the limit.
+        control_hz : float, optional
+            The rate at which the environment is stepped, by default 20. The
+            time of every step is recorded under ``timestamp``.
+        display_hz : float, optional
+            The maximum rate at which the display is refreshed, by default
+            30. The environment is stepped and recorded on a worker thread
+            independently of it; frames published between two refreshes are
+            dropped from the display and counted.
+        prewarm : bool, optional
+            If True, the environment of the next task is created and reset in
+            the background while a demonstration is being saved, by default
+            True.
+        collection_plan : list of tuple, optional
+            The (env, task) pairs to collect in order. The next task to
+            prewarm is the one following the saved task in the plan, or the
+            saved task itself if it is not in the plan or no plan is given.
 
         Returns
         -------
         None
         """
         self.master = master
-        self.demonstration_data = []
+        self.demonstration_data = EpisodeBuffer()
         self.is_paused = False
         self.input_handler = InputHandler(master)
 
@@ -47,6 +82,25 @@ class DemonstrationCollector:
         self.task_info_text = task_info_text
         self.demonstration_id = None
         self.is_demonstrating = False
+        self.streaming = streaming
+        self.episode_writer = None
+        self.current_observation = None
+        self.on_saved = on_saved
+        self.save_queue = SaveQueue(max_pending_saves)
+        self.save_poll_id = None
+        self.memory_budget_mb = memory_budget_mb
+        self.control_hz = control_hz
+        self.display_hz = display_hz
+        self.engine = None
+        self.task = None
+        self.display_throttle = DisplayThrottle(display_hz)
+        self.prewarm = prewarm
+        # Called with the env, the task and the seconds from starting a demonstration to its first frame.
+        self.on_first_frame = None
+        self.start_time = None
+        self.collection_plan = list(collection_plan or [])
+        self.stopped_callbacks = []
+        self.stopped_poll_id = None
 
         # Create left panel
         left_panel = ttk.Frame(master)
@@ -59,6 +113,8 @@ class DemonstrationCollector:
         # Create canvas
         self.canvas = tk.Canvas(left_panel, width=800, height=400, background="white")
         self.canvas.grid(row=4, column=0, columnspan=2, padx=5, pady=5)
+        self.canvas_image = CanvasImage(self.canvas)
+        self.compositor = FrameCompositor(400)
 
         # Create buttons
         ttk.Button(action_frame, text=" Start Environment ", command=self.start_demonstration).pack(side=tk.LEFT, padx=5)
@@ -66,6 +122,28 @@ class DemonstrationCollector:
         self.save_button.pack(side=tk.LEFT, padx=5)
         self.pause_button = ttk.Button(action_frame, text=" Pause ", command=self.pause, state=tk.DISABLED)
         self.pause_button.pack(side=tk.LEFT, padx=5)
+
+        # Save progress
+        self.save_progress = ttk.Progressbar(action_frame, mode="indeterminate", length=100)
+        self.save_progress.pack(side=tk.LEFT, padx=5)
+        self.save_status_var = tk.StringVar()
+        ttk.Label(action_frame, textvariable=self.save_status_var).pack(side=tk.LEFT, padx=5)
+
+        # Episode memory use
+        self.memory_var = tk.StringVar()
+        ttk.Label(action_frame, textvariable=self.memory_var).pack(side=tk.LEFT, padx=5)
+
+        # Control rate
+        self.rate_var = tk.StringVar()
+        ttk.Label(action_frame, textvariable=self.rate_var).pack(side=tk.LEFT, padx=5)
+
+        # Display rate and dropped frames
+        self.display_var = tk.StringVar()
+        ttk.Label(action_frame, textvariable=self.display_var).pack(side=tk.LEFT, padx=5)
+
+        # Prewarming hit rate and time saved
+        self.prewarm_var = tk.StringVar()
+        ttk.Label(action_frame, textvariable=self.prewarm_var).pack(side=tk.LEFT, padx=5)
         self.master.bind_all("<p>", self.pause)
         self.master.bind_all("<q>", self.start_demonstration)
         self.master.bind_all("<e>", self.save_demonstration)
@@ -74,7 +152,9 @@ class DemonstrationCollector:
         """
         Start a demonstration environment.
 
-        If a demonstration is already running, stop it first.
+        If a demonstration is already running, stop it first, and start once
+        its engine has stopped. The task is created and stepped by a
+        `CollectionEngine` on a worker thread.
 
         Parameters
         ----------
@@ -87,121 +167,266 @@ class DemonstrationCollector:
         """
         if self.is_demonstrating:
             self.stop_demonstration()
-            
+        if self.engine is not None and self.engine.running:
+            # The demonstration is discarded once the engine is done, it cannot be saved anymore.
+            self.save_button['state'] = tk.DISABLED
+            self.when_engine_stopped(self.start_demonstration)
+            return
+        self.discard_demonstration()
+        self.release_task()
+
         gc.collect()
         selected_env = self.env_combobox.get()
         selected_task = self.task_combobox.get()
-        self.task = self.env_manager.create_task(selected_env, selected_task)
         self.input_handler.reset()
         self.is_demonstrating = True
         self.is_paused = False
+        self.task = None
         self.pause_button.configure(text="Pause")
         self.save_button['state'] = tk.NORMAL
         self.pause_button['state'] = tk.NORMAL
-        self.demonstration_data = {"state": [], "action": [], "reward": [], "done": [], "observation": [], "instruction": ""}
-        state = self.task.reset()
-        frame = self.task.render()
-        self.demonstration_data["state"].append(state)
-        self.demonstration_data["observation"].append(frame)
+        if self.streaming:
+            self.episode_writer = self.data_manager.open_episode(selected_env, selected_task)
+
+        self.engine = CollectionEngine(
+            lambda: self.create_task(selected_env, selected_task),
+            self.input_handler.get_action,
+            self.record_step,
+            self.control_hz
+        )
+        self.display_throttle.reset()
+        self.start_time = time.perf_counter()
+        self.engine.start()
+        self.demonstration_id = self.master.after(0, self.step_environment)
+
+    def create_task(self, env_name, task_name):
+        """
+        Create the task of a new demonstration. Called on the engine thread.
 
-        self.update_display()
-        self.update_task_info()
-        self.demonstration_id = self.master.after(50, self.step_environment)
+        The environment manager hands out the environment prewarmed for the
+        task, or reuses an idle one, `release_task` hands it back after the
+        episode.
+
+        Returns
+        -------
+        tuple
+            The created task, already reset, and its initial state.
+        """
+        task, state = self.env_manager.create_reset_task(env_name, task_name)
+        if not self.streaming:
+            memory_budget = self.memory_budget_mb * 2 ** 20 if self.memory_budget_mb is not None else None
+            self.demonstration_data = EpisodeBuffer(max_steps=getattr(task, "max_steps", None),
+                                                    memory_budget=memory_budget)
+        return task, state
 
     def step_environment(self):
         """
-        Step the environment.
+        Show the progress of the environment.
 
-        If a demonstration is running, step the environment using the current action
-        from the input handler. If the environment is not paused, render the
-        environment and update the display.
+        The environment is stepped by the engine thread. This polls the
+        latest frame it published and updates the display and the status
+        labels, then reschedules itself at the display rate using `after`.
+        Frames the engine published since the previous refresh are skipped
+        and counted as dropped.
 
         If the environment is done, stop the demonstration and disable the pause button.
 
-        Otherwise, schedule the next step using `after`.
-
         Returns
         -------
         None
         """
-        if self.is_demonstrating:
-            done = False
-            if not self.is_paused:
-                action = self.input_handler.get_action()
-                (state, reward, terminated, truncated, info), action = self.task.step(action)
-                done = terminated or truncated
-                frame = self.task.render()
-                self.demonstration_data["state"].append(state)
-                self.demonstration_data["action"].append(action)
-                self.demonstration_data["reward"].append(reward)
-                self.demonstration_data["done"].append(done)
-                self.demonstration_data['instruction'] = self.task.task_description
-                self.demonstration_data["observation"].append(frame)
-                self.update_display()
-
-            if done:
-                self.is_demonstrating = False
-                self.pause_button['state'] = tk.DISABLED
-            else:
-                self.demonstration_id = self.master.after(50, self.step_environment)
+        if not self.is_demonstrating or self.engine is None:
+            return
+        engine = self.engine
+        if self.task is None and engine.ready.is_set() and engine.task is not None:
+            self.task = engine.task
+            self.update_task_info()
+            self.update_prewarm_display()
+        frame = self.display_throttle.poll(engine.latest)
+        if frame is not None:
+            self.current_observation = frame
+            self.update_display()
+            self.update_rate_display()
+            self.update_memory_display()
+            self.display_var.set(self.display_throttle.status())
+            if self.start_time is not None:
+                latency, self.start_time = time.perf_counter() - self.start_time, None
+                if self.on_first_frame is not None:
+                    self.on_first_frame(self.env_combobox.get(), self.task_combobox.get(), latency)
+
+        if engine.error is not None:
+            self.stop_demonstration()
+            self.save_button['state'] = tk.DISABLED
+            messagebox.showerror("Environment Error", f"The environment failed: {engine.error}")
+        elif not engine.running and engine.ready.is_set():
+            self.is_demonstrating = False
+            self.pause_button['state'] = tk.DISABLED
+            self.demonstration_id = None
+        else:
+            self.demonstration_id = self.master.after(self.display_throttle.next_delay_ms(), self.step_environment)
 
     def stop_demonstration(self):
         """
         Stop the current demonstration.
 
-        If a demonstration is currently running, stop it by cancelling the
-        scheduled `after` call and resetting the demonstration state.
+        If a demonstration is currently running, stop it by stopping the
+        engine thread, cancelling the scheduled `after` call and resetting
+        the demonstration state. The Tk thread does not wait for the step
+        in progress, use `when_engine_stopped` to act once it is done.
 
         Returns
         -------
         None
         """
+        if self.engine is not None:
+            self.engine.stop(wait=False)
         if self.demonstration_id:
             self.master.after_cancel(self.demonstration_id)
         self.is_demonstrating = False
         self.pause_button['state'] = tk.DISABLED
         self.demonstration_id = None
 
+    def when_engine_stopped(self, callback, *args):
+        """
+        Call `callback` with `args` on the Tk thread once the engine thread is done.
+
+        The engine is polled with `after`, so the window keeps responding
+        while the step in progress finishes. Callbacks run in the order
+        they were added, a callback already waiting is not added again.
+
+        Returns
+        -------
+        None
+        """
+        if (callback, args) not in self.stopped_callbacks:
+            self.stopped_callbacks.append((callback, args))
+        if self.stopped_poll_id is None:
+            self.poll_engine_stopped()
+
+    def poll_engine_stopped(self):
+        """
+        Run the callbacks of `when_engine_stopped` if the engine is done, or poll again shortly.
+
+        Returns
+        -------
+        None
+        """
+        if self.engine is not None and self.engine.running:
+            self.stopped_poll_id = self.master.after(10, self.poll_engine_stopped)
+            return
+        self.stopped_poll_id = None
+        callbacks, self.stopped_callbacks = self.stopped_callbacks, []
+        for callback, args in callbacks:
+            callback(*args)
+
+    def record_step(self, step):
+        """
+        Record one step of the current demonstration. Called on the engine thread.
+
+        The step is handed to the episode writer when streaming, and appended
+        to the `EpisodeBuffer` in `demonstration_data` otherwise.
+
+        Parameters
+        ----------
+        step : dict
+            The values recorded at this step, e.g. state, action, observation
+            and timestamp.
+
+        Returns
+        -------
+        None
+        """
+        if self.episode_writer is not None:
+            self.episode_writer.append(step)
+        else:
+            self.demonstration_data.append(step)
+
+    def discard_demonstration(self):
+        """
+        Drop the current demonstration if it was not saved.
+
+        When streaming, the partially written episode is removed from disk.
+        Otherwise the spill files of the episode buffer are deleted. Queued
+        saves keep the buffer mapped until they are done.
+
+        Returns
+        -------
+        None
+        """
+        if self.episode_writer is not None:
+            self.episode_writer.abort()
+            self.episode_writer = None
+        self.demonstration_data.close()
+
+    def release_task(self):
+        """
+        Hand the task of the last demonstration back to the environment manager.
+
+        The task is kept for reuse unless the engine failed, in which case
+        it is closed. A worker process that was restarted after a fault is
+        kept. Waits for the engine if it has not stopped yet, call it from
+        `when_engine_stopped` on the Tk thread.
+
+        Returns
+        -------
+        None
+        """
+        engine = self.engine
+        if engine is None or engine.task is None:
+            return
+        engine.stop()
+        restarted = isinstance(engine.error, EnvWorkerError) and engine.task.alive
+        self.env_manager.release_task(engine.task, reusable=engine.error is None or restarted)
+        engine.task = None
+        self.task = None
+
+    def update_rate_display(self):
+        rate = self.engine.rate
+        self.rate_var.set(f"Control: {rate.measured_hz:.1f} / {rate.hz:g} Hz, {rate.overruns} overruns")
+
+    def update_memory_display(self):
+        """
+        Show how much memory the current episode takes.
+
+        Returns
+        -------
+        None
+        """
+        if self.episode_writer is not None:
+            self.memory_var.set(f"Memory: streaming, {self.episode_writer.pending_steps} steps queued")
+            return
+        buffer = self.demonstration_data
+        text = f"Memory: {buffer.memory_nbytes / 2 ** 20:.0f} MB"
+        if self.memory_budget_mb is not None:
+            text += f" / {self.memory_budget_mb:.0f} MB"
+        if buffer.spilled:
+            text += f", {buffer.spilled_nbytes / 2 ** 20:.0f} MB spilled to disk"
+        self.memory_var.set(text)
+
     def update_display(self):
         """
         Update the display of the current demonstration.
 
         This function updates the display of the current demonstration by
         rendering the current frame of the demonstration and displaying it
-        on the canvas. If the frame is a dict, it concatenates all values
-        horizontally after resizing and padding each to square.
+        on the canvas. If the frame is a dict, the `FrameCompositor` lays out
+        all values horizontally after resizing and padding each to square.
 
         Returns
         -------
         None
         """
-        frame = self.demonstration_data["observation"][-1]
-
-        if isinstance(frame, dict):
-            images = [resize_and_pad_to_square(Image.fromarray(v), 400) for v in frame.values()]
-            widths, heights = zip(*(img.size for img in images))
-            total_width = sum(widths)
-            max_height = max(heights)
-            new_img = Image.new('RGB', (total_width, max_height))
-            x_offset = 0
-            for img in images:
-                new_img.paste(img, (x_offset, 0))
-                x_offset += img.width
-            img = new_img
-        else:
-            img = resize_and_pad_to_square(Image.fromarray(frame), 400)
-
-        img = ImageTk.PhotoImage(img)
-        self.canvas.create_image(0, 0, anchor=tk.NW, image=img)
-        self.canvas.image = img
+        self.canvas_image.show(self.compositor.compose_image(self.current_observation))
 
     def save_demonstration(self, event=None):
         """
         Save the current demonstration.
 
         If the save button is currently enabled, this function will disable
-        the save and pause buttons, and then save the current demonstration
-        to the data manager.
+        the save and pause buttons, stop the engine, and once it is done
+        queue the current demonstration to be written by the data manager in
+        the background. A new demonstration can be started while it is being
+        written.
 
         Parameters
         ----------
@@ -213,13 +438,135 @@ class DemonstrationCollector:
         None
         """
         if str(self.save_button['state']) == tk.NORMAL:
-            self.is_demonstrating = False
             self.save_button['state'] = tk.DISABLED
-            self.pause_button['state'] = tk.DISABLED
-            env_name = self.env_combobox.get()
-            task_name = self.task_combobox.get()
-            self.data_manager.save_demonstration(env_name, task_name, self.demonstration_data)
-            messagebox.showinfo("Demonstration Saved", "Demonstration has been saved successfully.")
+            # No steps may be recorded while the episode is handed over.
+            self.stop_demonstration()
+            self.when_engine_stopped(self.queue_demonstration, self.env_combobox.get(), self.task_combobox.get())
+
+    def queue_demonstration(self, env_name, task_name):
+        """
+        Queue the stopped demonstration to be saved in the background.
+
+        Called by `save_demonstration` once the engine is done. If the save
+        queue is full, the demonstration is kept and can be saved again.
+
+        Returns
+        -------
+        None
+        """
+        task = self.engine.task if self.engine is not None else None
+        instruction = task.task_description if task is not None else ""
+        recorded = (self.episode_writer.n_actions if self.episode_writer is not None
+                    else len(self.demonstration_data))
+        if recorded == 0:
+            self.discard_demonstration()
+            self.save_status_var.set("Nothing recorded, not saved")
+            return
+        try:
+            if self.episode_writer is not None:
+                self.save_queue.submit(self.episode_writer.close, instruction,
+                                       on_done=self.on_save_done, on_error=self.on_save_error)
+                self.episode_writer = None
+            else:
+                self.save_queue.submit(self.data_manager.save_demonstration, env_name, task_name,
+                                       self.demonstration_data.to_dict(instruction),
+                                       on_done=self.on_save_done, on_error=self.on_save_error)
+        except queue.Full:
+            self.save_button['state'] = tk.NORMAL
+            messagebox.showwarning("Save Queue Full",
+                                   "Too many demonstrations are still being saved, please try again shortly.")
+            return
+        if self.save_poll_id is None:
+            self.update_save_progress()
+        if self.prewarm:
+            # The environment is reset for the next episode while this one is saved.
+            self.release_task()
+            self.env_manager.prewarm(*self.next_task(env_name, task_name))
+
+    def next_task(self, env_name, task_name):
+        """
+        Return the task most likely collected after `task_name`.
+
+        Returns
+        -------
+        tuple
+            The env and task name following the given ones in
+            `collection_plan`, or the given ones.
+        """
+        plan = self.collection_plan
+        if (env_name, task_name) in plan:
+            return plan[(plan.index((env_name, task_name)) + 1) % len(plan)]
+        return env_name, task_name
+
+    def update_prewarm_display(self):
+        """
+        Show how often the environment was prewarmed and the time it saved.
+
+        Returns
+        -------
+        None
+        """
+        if not self.prewarm:
+            return
+        stats = self.env_manager.pool.stats()
+        taken = stats["prewarm_hits"] + stats["prewarm_misses"]
+        if taken:
+            self.prewarm_var.set(f"Prewarm: {stats['prewarm_hits']}/{taken} hits, "
+                                 f"{stats['last_seconds_saved']:.1f} s saved "
+                                 f"({stats['seconds_saved']:.1f} s total)")
+
+    def update_save_progress(self):
+        """
+        Show the progress of background saves and run their callbacks.
+
+        Reschedules itself with `after` while saves are pending.
+
+        Returns
+        -------
+        None
+        """
+        pending = self.save_queue.poll()
+        if pending:
+            if self.save_poll_id is None:
+                self.save_progress.start(10)
+            self.save_status_var.set(f"Saving {pending} demonstration(s)...")
+            self.save_poll_id = self.master.after(100, self.update_save_progress)
+        else:
+            self.save_progress.stop()
+            self.save_poll_id = None
+
+    def on_save_done(self, demo_id):
+        self.save_status_var.set(f"Saved {demo_id}")
+        if self.on_saved is not None:
+            self.on_saved(demo_id)
+
+    def on_save_error(self, error):
+        self.save_status_var.set("Save failed")
+        messagebox.showerror("Save Failed", f"The demonstration could not be saved: {error}")
+
+    def close(self):
+        """
+        Stop recording and wait until the queued demonstrations are saved.
+
+        Returns
+        -------
+        None
+        """
+        self.stop_demonstration()
+        if self.engine is not None:
+            self.engine.stop()
+        if self.stopped_poll_id is not None:
+            self.master.after_cancel(self.stopped_poll_id)
+        # Demonstrations waiting for the engine are still queued, a pending start is dropped.
+        self.stopped_callbacks = [(callback, args) for callback, args in self.stopped_callbacks
+                                  if callback != self.start_demonstration]
+        self.poll_engine_stopped()
+        self.discard_demonstration()
+        self.release_task()
+        if self.save_poll_id is not None:
+            self.master.after_cancel(self.save_poll_id)
+            self.save_poll_id = None
+        self.save_queue.close()
 
     def pause(self, event=None):
         """
@@ -242,6 +589,8 @@ class DemonstrationCollector:
         """
         if str(self.pause_button['state']) == tk.NORMAL:
             self.is_paused = not self.is_paused
+            if self.engine is not None:
+                self.engine.paused = self.is_paused
             self.pause_button.configure(text="Continue" if self.is_paused else "Pause")
 
     def update_demo_list(self):
@@ -1,7 +1,6 @@
 import tkinter as tk
 from tkinter import ttk
-from PIL import Image, ImageTk
-from utils.tools import resize_and_pad_to_square
+from utils.display import CanvasImage, FrameCompositor
 
 
 class DemoPlayer:
@@ -22,11 +21,13 @@ class DemoPlayer:
         self.current_frame = 0
         self.total_frames = 0
         self.demo_listbox = demo_listbox
-        self.demonstration_data = None
+        self.demo_handle = None
 
         # Create playback canvas
         self.playback = tk.Canvas(master, width=800, height=400, bg='white')
         self.playback.grid(row=0, column=0, columnspan=5, padx=5, pady=5, sticky='nsew')
+        self.playback_image = CanvasImage(self.playback)
+        self.compositor = FrameCompositor(400)
 
         # Create buttons
         button_frame = ttk.Frame(master)
@@ -47,7 +48,7 @@ class DemoPlayer:
         self.info_text.grid(row=2, column=0, columnspan=5, padx=10, pady=10, sticky='nsew')
         self.info_text.config(state=tk.DISABLED)
 
-    def play_pause(self, demo_data=None):
+    def play_pause(self, demo_handle=None):
         """
         Play or pause the current demonstration.
 
@@ -59,12 +60,14 @@ class DemoPlayer:
 
         Parameters
         ----------
-        demo_data : list, optional
-            The demonstration data to play. If not provided, the demonstration
-            data that was previously loaded will be used.
+        demo_handle : DemoHandle, optional
+            The demonstration to play. Frames are read from it on demand. If not
+            provided, the demonstration that was previously loaded will be used.
         """
-        if demo_data:
-            self.demonstration_data = demo_data
+        if demo_handle is not None:
+            if self.demo_handle is not None and self.demo_handle is not demo_handle:
+                self.demo_handle.close()
+            self.demo_handle = demo_handle
             self.is_playing = True
             self.play_demonstration()
 
@@ -99,11 +102,23 @@ class DemoPlayer:
         self.update_frame()
 
     def play_demonstration(self):
-        if self.demonstration_data:
-            self.total_frames = len(self.demonstration_data['observation'])
+        if self.demo_handle is not None:
+            self.total_frames = len(self.demo_handle)
             self.current_frame = 0
             self.update_frame()
 
+    def unload(self):
+        """
+        Stop playback and close the loaded demonstration.
+        """
+        if self.demo_handle is not None:
+            self.demo_handle.close()
+        self.demo_handle = None
+        self.current_frame = 0
+        self.total_frames = 0
+        self.playback_image.clear()
+        self.update_frame()
+
     def update_frame(self):
         """
         Update the display of the current demonstration.
@@ -119,38 +134,15 @@ class DemoPlayer:
         """
 
         if self.current_frame < self.total_frames:
-            frame = self.demonstration_data['observation'][self.current_frame]
-
-            if isinstance(frame, dict):
-                images = [resize_and_pad_to_square(Image.fromarray(v), 400) for v in frame.values()]
-                widths, heights = zip(*(img.size for img in images))
-                total_width = sum(widths)
-                max_height = max(heights)
-                new_img = Image.new('RGB', (total_width, max_height))
-                x_offset = 0
-                for img in images:
-                    new_img.paste(img, (x_offset, 0))
-                    x_offset += img.width
-                img = new_img
-            else:
-                img = resize_and_pad_to_square(Image.fromarray(frame), 400)
-
-            img = ImageTk.PhotoImage(img)
-            self.playback.create_image(0, 0, anchor=tk.NW, image=img)
-            self.playback.image = img
+            step = self.demo_handle.frame(self.current_frame)
+            self.playback_image.show(self.compositor.compose_image(step['observation']))
             
             self.info_text.config(state=tk.NORMAL)
             self.info_text.delete('1.0', tk.END)
-            try:
-                instruction = self.demonstration_data['instruction'].decode()
-            except Exception:
-                pass
-                # instruction = self.demonstration_data['instruction'].decode()
-            self.info_text.insert(tk.END, f"Instruction: {instruction}\n")
-            self.info_text.insert(tk.END, f"Action: {self.demonstration_data['action'][self.current_frame]}\n")
-            self.info_text.insert(tk.END, f"Done: {self.demonstration_data['done'][self.current_frame]}\n")
+            self.info_text.insert(tk.END, f"Instruction: {self.demo_handle.instruction}\n")
+            self.info_text.insert(tk.END, f"Action: {step['action']}\n")
+            self.info_text.insert(tk.END, f"Done: {step['done']}\n")
             self.info_text.config(state=tk.DISABLED)
-            self.total_frames = len(self.demonstration_data['observation'])
             
             if self.is_playing:
                 self.current_frame += 1
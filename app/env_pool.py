@@ -0,0 +1,267 @@
+import os
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _rss_bytes(pid="self"):
+    """The resident memory of a process in bytes, or None where /proc is not available."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class EnvPool:
+    def __init__(self, build, max_instances=4, memory_cap_mb=None):
+        """
+        Keep built task environments warm for reuse.
+
+        Building a task, e.g. a LIBERO ``OffScreenRenderEnv`` or a Meta-World
+        env with its renderers, takes seconds, while resetting it takes a
+        fraction of that. `acquire` hands out an idle instance of the same
+        (env, task) if there is one, and builds one otherwise. `release`
+        puts an instance back once its episode is over. Idle instances are
+        closed least recently used first when there are more than
+        `max_instances` of them, or when their estimated memory exceeds
+        `memory_cap_mb`.
+
+        The memory of an instance is estimated as the growth of the resident
+        memory of the process while it was built, or taken from its
+        ``rss_bytes`` if it runs in a process of its own.
+
+        `prewarm` builds or takes an instance and resets it on a background
+        thread ahead of time, e.g. while the operator saves an episode, and
+        `take_prewarmed` picks it up already reset.
+
+        Parameters
+        ----------
+        build : callable
+            Called with the env and task name to build a new instance.
+        max_instances : int, optional
+            The maximum number of idle instances kept, by default 4. 0
+            disables reuse.
+        memory_cap_mb : float, optional
+            The maximum estimated memory of the idle instances, unlimited by
+            default.
+        """
+        self.build = build
+        self.max_instances = max_instances
+        self.memory_cap_mb = memory_cap_mb
+        self._lock = threading.Lock()
+        self._idle = OrderedDict()
+        self._in_use = {}
+        self._footprints = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.build_seconds = {}
+        self._prewarm_executor = None
+        self._prewarming = {}
+        self.prewarm_hits = 0
+        self.prewarm_misses = 0
+        self.seconds_saved = 0.0
+        self.last_seconds_saved = 0.0
+
+    def acquire(self, env_name, task_name):
+        """
+        Return an instance of the task, reused if one is idle.
+
+        The instance is not reset, the caller resets it before its episode.
+        Call `activate` of the instance on the thread that steps it.
+
+        Returns
+        -------
+        BaseEnv
+            The task instance.
+        """
+        key = (env_name, task_name)
+        with self._lock:
+            instances = self._idle.get(key)
+            if instances:
+                task = instances.pop()
+                if not instances:
+                    del self._idle[key]
+                self._in_use[id(task)] = key
+                self.hits += 1
+                return task
+            self.misses += 1
+        rss = _rss_bytes()
+        start = time.perf_counter()
+        task = self.build(env_name, task_name)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.build_seconds[key] = elapsed
+            if getattr(task, "rss_bytes", None) is not None:
+                self._footprints[key] = task.rss_bytes
+            elif rss is not None:
+                self._footprints[key] = max(_rss_bytes() - rss, 0)
+            self._in_use[id(task)] = key
+        return task
+
+    def release(self, task):
+        """Put an instance handed out by `acquire` back to be reused."""
+        with self._lock:
+            key = self._in_use.pop(id(task), None)
+            if key is None:
+                return
+            self._idle.setdefault(key, []).append(task)
+            self._idle.move_to_end(key)
+            evicted = self._evict()
+        for instance in evicted:
+            self._close(instance)
+
+    def discard(self, task):
+        """Close an instance handed out by `acquire` instead of reusing it, e.g. after it failed."""
+        with self._lock:
+            self._in_use.pop(id(task), None)
+        self._close(task)
+
+    def prewarm(self, env_name, task_name):
+        """
+        Acquire and reset an instance of the task on a background thread.
+        The instance is activated for the reset and deactivated afterwards,
+        so the thread that steps it can `activate` it.
+
+        An instance prewarmed for another task and not taken yet is released
+        once it is ready.
+        """
+        key = (env_name, task_name)
+        with self._lock:
+            if key in self._prewarming:
+                return
+            if self._prewarm_executor is None:
+                self._prewarm_executor = ThreadPoolExecutor(1, thread_name_prefix="EnvPrewarm")
+            stale = list(self._prewarming.values())
+            self._prewarming = {key: self._prewarm_executor.submit(self._warm, env_name, task_name)}
+        for future in stale:
+            future.add_done_callback(self._release_prewarmed)
+
+    def _warm(self, env_name, task_name):
+        start = time.perf_counter()
+        task = self.acquire(env_name, task_name)
+        try:
+            # The reset renders on this thread, and the engine thread takes the task over afterwards.
+            task.activate()
+            try:
+                state = task.reset()
+            finally:
+                task.deactivate()
+        except Exception:
+            self.discard(task)
+            raise
+        return task, state, time.perf_counter() - start
+
+    def _release_prewarmed(self, future):
+        if not future.cancelled() and future.exception() is None:
+            self.release(future.result()[0])
+
+    def take_prewarmed(self, env_name, task_name):
+        """
+        Take the instance prewarmed for the task, waiting for it if it is
+        still being prepared. Instances prewarmed for other tasks are
+        released.
+
+        Counts a hit and the seconds it saved, i.e. the time spent preparing
+        it minus the time waited for it, or a miss if nothing was prewarmed
+        for the task.
+
+        Returns
+        -------
+        tuple or None
+            The reset instance and the state returned by its reset, or None.
+        """
+        with self._lock:
+            future = self._prewarming.pop((env_name, task_name), None)
+            stale = list(self._prewarming.values())
+            self._prewarming = {}
+        for other in stale:
+            other.add_done_callback(self._release_prewarmed)
+        if future is None:
+            with self._lock:
+                self.prewarm_misses += 1
+                self.last_seconds_saved = 0.0
+            return None
+        start = time.perf_counter()
+        try:
+            task, state, spent = future.result()
+        except Exception:
+            traceback.print_exc()
+            with self._lock:
+                self.prewarm_misses += 1
+                self.last_seconds_saved = 0.0
+            return None
+        saved = max(spent - (time.perf_counter() - start), 0.0)
+        with self._lock:
+            self.prewarm_hits += 1
+            self.seconds_saved += saved
+            self.last_seconds_saved = saved
+        return task, state
+
+    def idle_nbytes(self):
+        """The estimated memory of the idle instances in bytes."""
+        with self._lock:
+            return self._idle_nbytes()
+
+    def _idle_nbytes(self):
+        return sum(self._footprints.get(key, 0) * len(instances) for key, instances in self._idle.items())
+
+    def _idle_count(self):
+        return sum(len(instances) for instances in self._idle.values())
+
+    def _evict(self):
+        cap = self.memory_cap_mb * 2 ** 20 if self.memory_cap_mb is not None else None
+        evicted = []
+        while self._idle and (self._idle_count() > self.max_instances
+                              or (cap is not None and self._idle_nbytes() > cap)):
+            key, instances = next(iter(self._idle.items()))
+            evicted.append(instances.pop(0))
+            if not instances:
+                del self._idle[key]
+            self.evictions += 1
+        return evicted
+
+    @staticmethod
+    def _close(task):
+        try:
+            task.close()
+        except Exception:
+            traceback.print_exc()
+
+    def stats(self):
+        """
+        Return the reuse counters of the pool.
+
+        Returns
+        -------
+        dict
+            The ``hits``, ``misses`` and ``evictions`` so far, the number of
+            ``idle`` instances and their estimated memory ``idle_bytes``, and
+            the ``prewarm_hits``, ``prewarm_misses``, ``seconds_saved`` in
+            total and ``last_seconds_saved`` by prewarming.
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "idle": self._idle_count(), "idle_bytes": self._idle_nbytes(),
+                    "prewarm_hits": self.prewarm_hits, "prewarm_misses": self.prewarm_misses,
+                    "seconds_saved": self.seconds_saved, "last_seconds_saved": self.last_seconds_saved}
+
+    def close(self):
+        """Close all idle and prewarmed instances. Instances in use are closed by `release` or `discard`."""
+        with self._lock:
+            executor, self._prewarm_executor = self._prewarm_executor, None
+            prewarming = list(self._prewarming.values())
+            self._prewarming = {}
+            self.max_instances = 0
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+        for future in prewarming:
+            self._release_prewarmed(future)
+        with self._lock:
+            instances = [task for tasks in self._idle.values() for task in tasks]
+            self._idle.clear()
+        for task in instances:
+            self._close(task)
@@ -0,0 +1,219 @@
+import multiprocessing as mp
+import threading
+import traceback
+import numpy as np
+from app.env_pool import _rss_bytes
+from environments.base_env import BaseEnv
+from utils.shm_ring import FrameRing, frame_spec
+
+
+# Attributes of the task copied to the proxy, refreshed after every reset.
+_TASK_ATTRIBUTES = ("task_description", "default_action", "max_steps")
+
+
+class EnvWorkerError(RuntimeError):
+    """The environment worker process crashed or did not answer in time."""
+
+
+def _task_info(task):
+    return {name: getattr(task, name) for name in _TASK_ATTRIBUTES if hasattr(task, name)}
+
+
+def _worker(conn, task_class):
+    """Build the task and serve the commands of its `ProcessEnv`."""
+    ring = None
+    try:
+        if isinstance(task_class, str):
+            from app.environment import resolve_task_class
+            task_class = resolve_task_class(task_class)
+        task = task_class()
+    except Exception:
+        conn.send(("error", traceback.format_exc()))
+        return
+    conn.send(("ok", _task_info(task)))
+    while True:
+        try:
+            command, args = conn.recv()
+        except (EOFError, OSError):
+            break
+        try:
+            if command == "reset":
+                value = (task.reset(), _task_info(task))
+            elif command == "step":
+                value = task.step(*args)
+            elif command == "render":
+                frame = task.render()
+                spec = frame_spec(frame)
+                if ring is None or ring.spec != spec:
+                    # The proxy creates the ring, so it outlives a crash of this process.
+                    if ring is not None:
+                        ring.close()
+                    conn.send(("spec", spec))
+                    ring = conn.recv()
+                value = ring.write(frame, track_release=False)
+            elif command == "getattr":
+                value = getattr(task, args[0])
+            elif command == "close":
+                task.close()
+                conn.send(("ok", None))
+                break
+            else:
+                raise ValueError(f"Unknown command {command!r}")
+        except Exception:
+            conn.send(("error", traceback.format_exc()))
+            continue
+        conn.send(("ok", value))
+    if ring is not None:
+        ring.close()
+
+
+class ProcessEnv(BaseEnv):
+    def __init__(self, task_class, timeout=30.0, startup_timeout=300.0, max_restarts=3):
+        """
+        Host a task in a child process behind the `BaseEnv` interface.
+
+        A crash or a hang of the simulator, e.g. in MuJoCo or EGL, only takes
+        down the child process, and stepping the simulator does not compete
+        with the GUI for the GIL. Commands and their small results travel
+        through a pipe, rendered frames through a shared-memory `FrameRing`.
+
+        When the worker crashes or a command times out, the worker is
+        killed and started again, and the command raises `EnvWorkerError`.
+        The task then has to be reset before it is stepped again.
+
+        Parameters
+        ----------
+        task_class : type or str
+            The task class, or its ``"module:class"`` path, which is then
+            only imported by the worker.
+        timeout : float, optional
+            The seconds a command may take, by default 30.
+        startup_timeout : float, optional
+            The seconds building the task may take, by default 300.
+        max_restarts : int, optional
+            How many times the worker is restarted after a fault before the
+            proxy gives up, by default 3.
+        """
+        self.task_class = task_class
+        self.timeout = timeout
+        self.startup_timeout = startup_timeout
+        self.max_restarts = max_restarts
+        self.restarts = 0
+        self._context = mp.get_context("spawn")
+        self._lock = threading.Lock()
+        self._process = None
+        self._conn = None
+        self._ring = None
+        self._start_worker()
+
+    def _start_worker(self):
+        self._conn, child_conn = self._context.Pipe()
+        self._process = self._context.Process(target=_worker, args=(child_conn, self.task_class),
+                                              name="EnvWorker", daemon=True)
+        self._process.start()
+        child_conn.close()
+        try:
+            status, value = self._receive(self.startup_timeout)
+        except (EOFError, OSError, TimeoutError) as e:
+            self._stop_worker()
+            raise EnvWorkerError(f"The environment worker failed to start: {e!r}") from e
+        if status == "error":
+            self._stop_worker()
+            raise RuntimeError(f"The environment worker failed to build the task:\n{value}")
+        self.__dict__.update(value)
+
+    def _stop_worker(self, timeout=5.0):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        if self._process is not None:
+            self._process.join(timeout)
+            if self._process.is_alive():
+                self._process.kill()
+                self._process.join()
+            self._process = None
+        if self._ring is not None:
+            self._ring.close()
+            self._ring = None
+
+    def _receive(self, timeout):
+        if not self._conn.poll(timeout):
+            raise TimeoutError(f"No answer within {timeout} s")
+        return self._conn.recv()
+
+    def _restart(self, cause):
+        if self._process is not None:
+            self._process.kill()
+        self._stop_worker()
+        if self.restarts >= self.max_restarts:
+            raise EnvWorkerError(f"The environment worker failed ({cause!r}) and was restarted "
+                                 f"{self.restarts} times already, giving up") from cause
+        self.restarts += 1
+        self._start_worker()
+        raise EnvWorkerError(f"The environment worker failed ({cause!r}) and was restarted, "
+                             "reset the task to continue") from cause
+
+    def _call(self, command, *args):
+        with self._lock:
+            if self._process is None:
+                raise EnvWorkerError("The environment worker is not running")
+            try:
+                self._conn.send((command, args))
+                status, value = self._receive(self.timeout)
+                if status == "spec":
+                    if self._ring is not None:
+                        self._ring.close()
+                    self._ring = FrameRing(value, n_slots=2)
+                    self._conn.send(self._ring)
+                    status, value = self._receive(self.timeout)
+            except (EOFError, OSError, TimeoutError) as e:
+                self._restart(e)
+            if status == "error":
+                raise RuntimeError(f"'{command}' failed in the environment worker:\n{value}")
+            return value
+
+    @property
+    def rss_bytes(self):
+        """The resident memory of the worker process, or None if it is unknown."""
+        process = self._process
+        return _rss_bytes(process.pid) if process is not None else None
+
+    @property
+    def alive(self):
+        """True while the worker process is running."""
+        return self._process is not None and self._process.is_alive()
+
+    def reset(self):
+        state, info = self._call("reset")
+        self.__dict__.update(info)
+        return state
+
+    def step(self, action):
+        return self._call("step", action)
+
+    def render(self):
+        seq = self._call("render")
+        frame = self._ring.read(seq)
+        # The slot is overwritten by a later render, while the frame may still be queued for writing.
+        if isinstance(frame, dict):
+            return {key: np.array(value) for key, value in frame.items()}
+        return np.array(frame)
+
+    def close(self):
+        with self._lock:
+            if self._process is None:
+                return
+            try:
+                self._conn.send(("close", ()))
+                self._receive(self.timeout)
+            except (EOFError, OSError, TimeoutError):
+                traceback.print_exc()
+            self._stop_worker()
+
+    @property
+    def action_space(self):
+        return self._call("getattr", "action_space")
+
+    @property
+    def observation_space(self):
+        return self._call("getattr", "observation_space")
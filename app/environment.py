@@ -1,89 +1,243 @@
 import importlib
+import importlib.util
+from app.env_pool import EnvPool
+
+
+# The tasks of every environment, as "module:class" paths. Modules are only
+# imported when a task is created, so listing tasks does not import the
+# simulators. An environment is listed if the modules in "requires" are
+# installed.
+DEFAULT_ENVIRONMENTS = {
+    "metaworld_mt10": {
+        "requires": ("metaworld", "gymnasium"),
+        "tasks": {
+            "reach": "environments.metaworld.metaworld_env:Reach",
+            "push": "environments.metaworld.metaworld_env:Push",
+            "pick_place": "environments.metaworld.metaworld_env:PickPlace",
+            "door_open": "environments.metaworld.metaworld_env:DoorOpen",
+            "drawer_open": "environments.metaworld.metaworld_env:DrawerOpen",
+            "drawer_close": "environments.metaworld.metaworld_env:DrawerClose",
+            "button_press_topdown": "environments.metaworld.metaworld_env:ButtonPressTopdown",
+            "peg_insert_side": "environments.metaworld.metaworld_env:PegInsertSide",
+            "window_open": "environments.metaworld.metaworld_env:WindowOpen",
+            "window_close": "environments.metaworld.metaworld_env:WindowClose",
+        },
+    },
+    "libero_object": {
+        "requires": ("libero",),
+        "tasks": {f"task{i}": f"environments.libero.libero_env:libero_object_task_{i}" for i in range(10)},
+    },
+    "real": {
+        "requires": ("cv2",),
+        # Resetting moves the arm, so it is never done ahead of time.
+        "prewarm": False,
+        "tasks": {"RM65Cube": "environments.real.rm65_env:RM65Cube"},
+    },
+    "gym": {
+        "requires": ("gym",),
+        "tasks": {
+            "CartPole": "environments.gym_envs.gym_wrapper:CartPoleEnv",
+            "MountainCar": "environments.gym_envs.gym_wrapper:MountainCarEnv",
+        },
+    },
+}
+
+
+def _installed(module_name):
+    try:
+        return importlib.util.find_spec(module_name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def resolve_task_class(path):
+    """
+    Import the task class at a ``"module:class"`` path.
+
+    Parameters
+    ----------
+    path : str
+        The module and the class name separated by a colon.
+
+    Returns
+    -------
+    type
+        The task class.
+    """
+    module_path, _, class_name = path.partition(":")
+    return getattr(importlib.import_module(module_path), class_name)
+
 
-# Gym
-from environments.gym_envs.gym_wrapper import CartPoleEnv, MountainCarEnv
-# Real bot
-try:
-    from environments.real.rm65_env import RM65Cube
-    IMPORT_REALMAN = True
-except ImportError as e:
-    IMPORT_REALMAN = False
-# Meta-World
-try:
-    from environments.metaworld.metaworld_env import (
-        Reach, Push, PickPlace, DoorOpen, DrawerOpen, DrawerClose,
-        ButtonPressTopdown, PegInsertSide, WindowOpen, WindowClose
-    )
-    IMPORT_MT = True
-except ImportError as e:
-    IMPORT_MT = False
-# LIBERO
-try:
-    from environments.libero.libero_env import (
-        libero_object_task_0, libero_object_task_1, libero_object_task_2, libero_object_task_3, 
-        libero_object_task_4, libero_object_task_5, libero_object_task_6, libero_object_task_7, 
-        libero_object_task_8, libero_object_task_9
-    )
-    IMPORT_LIBERO = True
-except ImportError as e:
-    IMPORT_LIBERO = False
-    print(str(e))
-
-    
 class EnvironmentManager:
-    def __init__(self):
+    def __init__(self, max_pooled_envs=4, pool_memory_mb=None, isolated=False, worker_timeout=30.0):
+        """
+        Registry of the available tasks.
+
+        The default environments are listed from `DEFAULT_ENVIRONMENTS`
+        without importing their simulators; the module of a task is imported
+        when the task is first created.
+
+        Created tasks come from an `EnvPool`, so starting another episode of
+        a task reuses its environment instead of building a new one. With
+        `isolated`, every task runs in a worker process of its own behind a
+        `ProcessEnv`, so simulator crashes and hangs do not take down the
+        application.
+
+        Parameters
+        ----------
+        max_pooled_envs : int, optional
+            The maximum number of idle environments kept for reuse, by
+            default 4. 0 builds a new environment for every episode.
+        pool_memory_mb : float, optional
+            The maximum estimated memory of the idle environments, unlimited
+            by default.
+        isolated : bool, optional
+            If True, host every task in a worker process, by default False.
+        worker_timeout : float, optional
+            The seconds a command to a worker process may take before the
+            worker is restarted, by default 30.
+        """
         self.environments = {}
+        self.no_prewarm = set()
+        self.isolated = isolated
+        self.worker_timeout = worker_timeout
+        self.pool = EnvPool(self._build_task, max_pooled_envs, pool_memory_mb)
         self._register_default_environments()
 
     def _register_default_environments(self):
-        if IMPORT_MT:
-            self.register_environment('metaworld_mt10')  # metaworld-mt10
-            self.register_task('metaworld_mt10', 'reach', Reach)
-            self.register_task('metaworld_mt10', 'push', Push)
-            self.register_task('metaworld_mt10', 'pick_place', PickPlace)
-            self.register_task('metaworld_mt10', 'door_open', DoorOpen)
-            self.register_task('metaworld_mt10', 'drawer_open', DrawerOpen)
-            self.register_task('metaworld_mt10', 'drawer_close', DrawerClose)
-            self.register_task('metaworld_mt10', 'button_press_topdown', ButtonPressTopdown)
-            self.register_task('metaworld_mt10', 'peg_insert_side', PegInsertSide)
-            self.register_task('metaworld_mt10', 'window_open', WindowOpen)
-            self.register_task('metaworld_mt10', 'window_close', WindowClose)
-        
-        if IMPORT_LIBERO:
-            self.register_environment('libero_object')  # libero-object
-            self.register_task('libero_object', 'task0', libero_object_task_0)
-            self.register_task('libero_object', 'task1', libero_object_task_1)
-            self.register_task('libero_object', 'task2', libero_object_task_2)
-            self.register_task('libero_object', 'task3', libero_object_task_3)
-            self.register_task('libero_object', 'task4', libero_object_task_4)
-            self.register_task('libero_object', 'task5', libero_object_task_5)
-            self.register_task('libero_object', 'task6', libero_object_task_6)
-            self.register_task('libero_object', 'task7', libero_object_task_7)
-            self.register_task('libero_object', 'task8', libero_object_task_8)
-            self.register_task('libero_object', 'task9', libero_object_task_9)
-            
-        if IMPORT_REALMAN:
-            self.register_environment('real')  # real-65
-            self.register_task('real', 'RM65Cube', RM65Cube)
-        
-        self.register_environment('gym')  # gym-2
-        self.register_task('gym', 'CartPole', CartPoleEnv)
-        self.register_task('gym', 'MountainCar', MountainCarEnv)
-
-    def register_environment(self, env_name):
+        for env_name, spec in DEFAULT_ENVIRONMENTS.items():
+            if not all(_installed(module) for module in spec["requires"]):
+                continue
+            self.register_environment(env_name, prewarm=spec.get("prewarm", True))
+            for task_name, path in spec["tasks"].items():
+                self.register_task(env_name, task_name, path)
+
+    def register_environment(self, env_name, prewarm=True):
+        """
+        Add an environment without tasks.
+
+        Parameters
+        ----------
+        env_name : str
+            The name of the environment.
+        prewarm : bool, optional
+            Whether its tasks may be created and reset ahead of time by
+            `prewarm`, by default True.
+        """
         if env_name in self.environments:
             raise ValueError(f"Environment '{env_name}' is already registered")
         self.environments[env_name] = {}
-    
+        if not prewarm:
+            self.no_prewarm.add(env_name)
+
     def register_task(self, env_name, task_name, task_class):
+        """
+        Add a task to an environment.
+
+        Parameters
+        ----------
+        env_name : str
+            The name of the environment.
+        task_name : str
+            The name of the task.
+        task_class : type or str
+            The `BaseEnv` subclass of the task, or its ``"module:class"``
+            path, which is imported when the task is first created.
+        """
         if env_name not in self.environments:
             raise ValueError(f"Environment '{env_name}' not found")
         self.environments[env_name][task_name] = task_class
 
+    def get_task_class(self, env_name, task_name):
+        """Return the class of a task, importing its module if it was registered by path."""
+        if env_name not in self.environments or task_name not in self.environments[env_name]:
+            raise ValueError(f"Environment '{env_name}' or task '{task_name}' not found")
+        task_class = self.environments[env_name][task_name]
+        if isinstance(task_class, str):
+            task_class = resolve_task_class(task_class)
+            self.environments[env_name][task_name] = task_class
+        return task_class
+
     def create_task(self, env_name, task_name):
+        """
+        Return an environment of the task, reused from the pool if one is idle.
+
+        Call it on the thread that steps the environment and hand the
+        environment back with `release_task` when its episode is over.
+        """
+        if env_name not in self.environments or task_name not in self.environments[env_name]:
+            raise ValueError(f"Environment '{env_name}' or task '{task_name}' not found")
+        task = self.pool.acquire(env_name, task_name)
+        try:
+            task.activate()
+        except Exception:
+            self.pool.discard(task)
+            raise
+        return task
+
+    def create_reset_task(self, env_name, task_name):
+        """
+        Return a reset environment of the task and its initial state.
+
+        The environment prepared by `prewarm` is taken if there is one for
+        the task, otherwise one is created with `create_task` and reset.
+
+        Returns
+        -------
+        tuple
+            The task and the state returned by its reset.
+        """
+        if env_name not in self.environments or task_name not in self.environments[env_name]:
+            raise ValueError(f"Environment '{env_name}' or task '{task_name}' not found")
+        prewarmed = self.pool.take_prewarmed(env_name, task_name)
+        if prewarmed is not None:
+            task, state = prewarmed
+            try:
+                task.activate()
+            except Exception:
+                self.pool.discard(task)
+                raise
+            return task, state
+        task = self.create_task(env_name, task_name)
+        return task, task.reset()
+
+    def prewarm(self, env_name, task_name):
+        """
+        Create and reset an environment of the task in the background, to
+        be picked up by the next `create_reset_task` of the task.
+
+        Environments registered with ``prewarm=False`` and tasks whose class
+        sets ``prewarm = False``, e.g. real robots that move when reset, are
+        skipped.
+        """
         if env_name not in self.environments or task_name not in self.environments[env_name]:
             raise ValueError(f"Environment '{env_name}' or task '{task_name}' not found")
-        return self.environments[env_name][task_name]()
+        if env_name in self.no_prewarm:
+            return
+        # The module of a task that was not created yet is not imported on the caller's thread.
+        if getattr(self.environments[env_name][task_name], "prewarm", True):
+            self.pool.prewarm(env_name, task_name)
+
+    def release_task(self, task, reusable=True):
+        """Hand a task back for reuse, or close it if it is not `reusable`."""
+        if reusable:
+            self.pool.release(task)
+        else:
+            self.pool.discard(task)
+
+    def _build_task(self, env_name, task_name):
+        if self.isolated:
+            # Imported here so listing tasks does not pay for numpy and shared memory.
+            from app.env_process import ProcessEnv
+            if env_name not in self.environments or task_name not in self.environments[env_name]:
+                raise ValueError(f"Environment '{env_name}' or task '{task_name}' not found")
+            # A task registered by path is only imported by the worker.
+            return ProcessEnv(self.environments[env_name][task_name], timeout=self.worker_timeout)
+        return self.get_task_class(env_name, task_name)()
+
+    def close(self):
+        """Close the pooled and prewarmed environments."""
+        self.pool.close()
 
     def get_available_environments(self):
         return list(self.environments.keys())
@@ -104,7 +258,4 @@ class EnvironmentManager:
             return False
 
     def get_task_info(self, env_name, task_name):
-        if env_name not in self.environments or task_name not in self.environments[env_name]:
-            raise ValueError(f"Environment '{env_name}' or task '{task_name}' not found")
-
-        return self.environments[env_name][task_name].task_description
\ No newline at end of file
+        return self.get_task_class(env_name, task_name).task_description
\ No newline at end of file
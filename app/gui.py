@@ -46,6 +46,7 @@ class ImitationLearningGUI:
         self.is_playing = False
 
         self.create_widgets()
+        self.master.protocol("WM_DELETE_WINDOW", self.on_close)
 
     def create_widgets(self):
         self.create_tabs()
@@ -135,7 +136,8 @@ class ImitationLearningGUI:
         # Demonstration Collector
         self.demonstration_collector = DemonstrationCollector(
             bottom_left_panel, self.env_combobox, self.task_combobox, 
-            self.env_manager, self.data_manager, self.demo_listbox, self.task_info_text
+            self.env_manager, self.data_manager, self.demo_listbox, self.task_info_text,
+            on_saved=self.on_demonstration_saved
         )
         
         # Control information display area
@@ -240,6 +242,11 @@ class ImitationLearningGUI:
 
         ttk.Button(bottom_right_panel, text=" Add To Player ", command=self.view_demonstration).grid(row=0, column=0, padx=5, pady=5)
         ttk.Button(bottom_right_panel, text=" Delete ", command=self.delete_demonstration).grid(row=0, column=1, padx=5, pady=5)
+        ttk.Button(bottom_right_panel, text=" Compact ", command=self.compact_storage).grid(row=0, column=2, padx=5, pady=5)
+
+        # Storage statistics
+        self.storage_var = tk.StringVar()
+        ttk.Label(bottom_right_panel, textvariable=self.storage_var).grid(row=1, column=0, columnspan=3, padx=5, pady=5)
         
         # Left panel
         left_panel = ttk.Frame(self.manage_tab, width=200, height=600)
@@ -287,6 +294,40 @@ class ImitationLearningGUI:
         for demo in demo_list:
             self.demo_listbox.insert(tk.END, demo.split("/")[-1])
         self.update_page_display()
+        self.update_storage_display()
+
+    def on_demonstration_saved(self, demo_id):
+        self.update_demo_list()
+
+    def on_close(self):
+        # Pending saves are finished before the window goes away.
+        self.demonstration_collector.close()
+        self.env_manager.close()
+        self.playback.unload()
+        self.master.destroy()
+
+    def update_storage_display(self):
+        env_name = self.env_combobox_manage.get()
+        task_name = self.task_combobox_manage.get()
+        stats = self.data_manager.get_storage_stats(env_name, task_name)
+        size = sum(s["size"] for s in stats)
+        free = sum(s["free_bytes"] for s in stats)
+        deleted = sum(s["deleted_since_compaction"] for s in stats)
+        ratio = free / size if size else 0.0
+        self.storage_var.set(f"Storage: {size / 2 ** 20:.1f} MB, {ratio:.0%} free, {deleted} deleted")
+
+    def compact_storage(self):
+        env_name = self.env_combobox_manage.get()
+        task_name = self.task_combobox_manage.get()
+        thread = self.data_manager.compact_demonstrations(env_name, task_name)
+        self.storage_var.set("Compacting...")
+        self.master.after(200, self.wait_for_compaction, thread)
+
+    def wait_for_compaction(self, thread):
+        if thread.is_alive():
+            self.master.after(200, self.wait_for_compaction, thread)
+        else:
+            self.update_storage_display()
 
     def update_page_display(self):
         self.page_var.set(f"{self.current_page} / {self.total_pages}")
@@ -315,8 +356,8 @@ class ImitationLearningGUI:
             env_name = self.env_combobox_manage.get()
             task_name = self.task_combobox_manage.get()
             demo_id = selected_demo
-            demo_data = self.data_manager.load_demonstrations(env_name, task_name, demo_id)
-            self.playback.play_pause(demo_data)
+            demo_handle = self.data_manager.open_demonstration(env_name, task_name, demo_id)
+            self.playback.play_pause(demo_handle)
         else:
             messagebox.showwarning("No Selection", "Please select a demonstration to view.")
 
@@ -327,6 +368,8 @@ class ImitationLearningGUI:
                 env_name = self.env_combobox_manage.get()
                 task_name = self.task_combobox_manage.get()
                 demo_id = selected_demo
+                if self.playback.demo_handle is not None and self.playback.demo_handle.demo_id == demo_id:
+                    self.playback.unload()
                 self.data_manager.delete_demonstration(env_name, task_name, demo_id)
                 self.update_demo_list()
         else:
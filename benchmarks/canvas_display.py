@@ -0,0 +1,71 @@
+"""
+Benchmark of drawing frames on a Tk canvas over a long episode.
+
+Displays the frames of a 500-step episode on a canvas, once by creating a
+new image item and `PhotoImage` per frame as the GUI used to, and once with
+a persistent `CanvasImage` that pastes every frame into the same
+`PhotoImage`. Prints the display time at the start and the end of the
+episode and the number of canvas items left behind.
+
+Needs a display. Run from the repository root:
+
+    python -m benchmarks.canvas_display --steps 500
+"""
+import argparse
+import time
+import tkinter as tk
+
+import numpy as np
+from PIL import Image, ImageTk
+
+from utils.display import CanvasImage
+
+
+class CreateImagePerFrame:
+    """The old display path: a new canvas item for every frame."""
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+
+    def show(self, img):
+        img = ImageTk.PhotoImage(img)
+        self.canvas.create_image(0, 0, anchor=tk.NW, image=img)
+        self.canvas.image = img
+
+
+def run(root, view_cls, frames):
+    canvas = tk.Canvas(root, width=800, height=400)
+    canvas.pack()
+    view = view_cls(canvas)
+    times = []
+    for img in frames:
+        start = time.perf_counter()
+        view.show(img)
+        root.update()
+        times.append(time.perf_counter() - start)
+    items = len(canvas.find_all())
+    canvas.destroy()
+    return np.array(times) * 1000, items
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--steps", type=int, default=500)
+    parser.add_argument("--window", type=int, default=50, help="Number of frames averaged at start and end")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    frames = [Image.fromarray(rng.integers(0, 255, (400, 800, 3), dtype=np.uint8)) for _ in range(16)]
+    frames = [frames[i % len(frames)] for i in range(args.steps)]
+
+    root = tk.Tk()
+    for name, view_cls in [("create_image", CreateImagePerFrame), ("CanvasImage", CanvasImage)]:
+        times, items = run(root, view_cls, frames)
+        first, last = times[:args.window].mean(), times[-args.window:].mean()
+        print(f"{name:>12}: first {args.window} frames {first:6.2f} ms, last {args.window} frames {last:6.2f} ms, "
+              f"{items} canvas items")
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
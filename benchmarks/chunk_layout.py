@@ -0,0 +1,67 @@
+"""
+Benchmark of chunk layouts for per-frame random access and sequential reads.
+
+Saves the same LIBERO-sized two-camera episode with each chunk layout applied
+to the camera streams, then measures the latency of reading random single
+frames, as playback seeks and shuffled training loaders do, and the
+throughput of reading every frame in order, as playback does.
+
+Run from the repository root:
+
+    python -m benchmarks.chunk_layout --codec lzf --layouts auto frame time:16 time:64
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import h5py
+import numpy as np
+
+from benchmarks.parallel_compression import make_episode
+from utils.hdf5_utils import HDF5DataManager
+
+
+def run(layout, episode, args):
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as root:
+        manager = HDF5DataManager(root, codecs={"*": args.codec}, chunk_layouts={"observation/*": layout})
+        demo_id = manager.save_demonstration("bench", "layout", episode)
+        file_path = manager._get_demo_path("bench", "layout", demo_id)
+        size = os.path.getsize(file_path)
+        # A fresh handle per pass, so the HDF5 chunk cache starts cold.
+        with h5py.File(file_path, "r") as f:
+            frames = f[demo_id]["observation/agent_view"]
+            chunks = frames.chunks
+            indices = rng.integers(0, len(frames), args.reads)
+            start = time.perf_counter()
+            for i in indices:
+                frames[int(i)]
+            random_ms = (time.perf_counter() - start) / args.reads * 1000
+        with h5py.File(file_path, "r") as f:
+            frames = f[demo_id]["observation/agent_view"]
+            start = time.perf_counter()
+            for i in range(len(frames)):
+                frames[i]
+            sequential_fps = len(frames) / (time.perf_counter() - start)
+    return chunks, size, random_ms, sequential_fps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--steps", type=int, default=500)
+    parser.add_argument("--image-size", type=int, default=128)
+    parser.add_argument("--codec", default="gzip:4")
+    parser.add_argument("--layouts", nargs="+", default=["auto", "frame", "time:16", "time:64"])
+    parser.add_argument("--reads", type=int, default=500)
+    args = parser.parse_args()
+
+    episode = make_episode(args.steps, args.image_size)
+    print(f"{'layout':>8} {'chunks':>20} {'MiB':>7} {'random ms':>10} {'seq frames/s':>13}")
+    for layout in args.layouts:
+        chunks, size, random_ms, sequential_fps = run(layout, episode, args)
+        print(f"{layout:>8} {str(chunks):>20} {size / 2 ** 20:7.1f} {random_ms:10.3f} {sequential_fps:13.1f}")
+
+
+if __name__ == "__main__":
+    main()
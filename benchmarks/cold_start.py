@@ -0,0 +1,56 @@
+"""
+Benchmark of the cold start of the environment registry.
+
+Every run starts a fresh interpreter, so no module is cached. ``lazy``
+creates the `EnvironmentManager` and lists every task, which is what the GUI
+does on startup. ``eager`` also imports the class of every task, which is
+what startup cost before the registry resolved tasks lazily. Tasks whose
+simulator is not installed are not listed and cost nothing in either mode.
+
+Run from the repository root:
+
+    python -m benchmarks.cold_start --runs 5
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+
+LAZY = """
+from app.environment import EnvironmentManager
+manager = EnvironmentManager()
+for env_name in manager.get_available_environments():
+    manager.get_available_tasks(env_name)
+"""
+
+EAGER = LAZY + """
+for env_name in manager.get_available_environments():
+    for task_name in manager.get_available_tasks(env_name):
+        manager.get_task_class(env_name, task_name)
+"""
+
+
+def cold_start(code, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    baseline = cold_start("pass", args.runs)
+    print(f"{'python':>8}: {baseline * 1000:8.1f} ms")
+    for name, code in [("eager", EAGER), ("lazy", LAZY)]:
+        print(f"{name:>8}: {cold_start(code, args.runs) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
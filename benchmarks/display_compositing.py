@@ -0,0 +1,60 @@
+"""
+Benchmark of compositing camera frames for the display.
+
+Composes LIBERO-sized two-camera frames into the 800x400 display image,
+once with the former per-camera LANCZOS `resize_and_pad_to_square` followed
+by a new mosaic image, and once with `FrameCompositor`, which resizes with
+OpenCV straight into a reused mosaic buffer. Both produce a PIL image ready
+for the canvas.
+
+Run from the repository root:
+
+    python -m benchmarks.display_compositing --frames 200
+"""
+import argparse
+import time
+
+import numpy as np
+from PIL import Image
+
+from utils.display import FrameCompositor
+from utils.tools import resize_and_pad_to_square
+
+
+def compose_pil(frame):
+    """The former display path of the collector and the player."""
+    images = [resize_and_pad_to_square(Image.fromarray(v), 400) for v in frame.values()]
+    widths, heights = zip(*(img.size for img in images))
+    new_img = Image.new('RGB', (sum(widths), max(heights)))
+    x_offset = 0
+    for img in images:
+        new_img.paste(img, (x_offset, 0))
+        x_offset += img.width
+    return new_img
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--image-size", type=int, default=256)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    frames = [
+        {
+            "agent_view": rng.integers(0, 255, (args.image_size, args.image_size, 3), dtype=np.uint8),
+            "gripper_view": rng.integers(0, 255, (args.image_size, args.image_size, 3), dtype=np.uint8),
+        }
+        for _ in range(8)
+    ]
+    compositor = FrameCompositor(400)
+    for name, compose in [("PIL LANCZOS", compose_pil), ("compositor", compositor.compose_image)]:
+        start = time.perf_counter()
+        for i in range(args.frames):
+            compose(frames[i % len(frames)])
+        per_frame = (time.perf_counter() - start) / args.frames * 1000
+        print(f"{name:>12}: {per_frame:7.2f} ms per frame")
+
+
+if __name__ == "__main__":
+    main()
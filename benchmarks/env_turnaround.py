@@ -0,0 +1,49 @@
+"""
+Benchmark of the turnaround between two episodes of the same task.
+
+Every episode creates the task through `EnvironmentManager.create_task`,
+resets it and renders the first frame, then hands it back with
+`release_task`, like the collector does on every press of ``q``. The
+episodes run once with the environment pool disabled, which builds a new
+environment every time, and once with the default pool.
+
+Needs the simulator of the task to be installed. Run from the repository
+root:
+
+    python -m benchmarks.env_turnaround --env libero_object --task task0
+"""
+import argparse
+import time
+
+from app.environment import EnvironmentManager
+
+
+def run(manager, env_name, task_name, episodes):
+    times = []
+    for _ in range(episodes):
+        start = time.perf_counter()
+        task = manager.create_task(env_name, task_name)
+        task.reset()
+        task.render()
+        times.append(time.perf_counter() - start)
+        manager.release_task(task)
+    manager.close()
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--env", default="gym")
+    parser.add_argument("--task", default="CartPole")
+    parser.add_argument("--episodes", type=int, default=5)
+    args = parser.parse_args()
+
+    for name, pooled in [("rebuild", 0), ("pooled", 4)]:
+        times = run(EnvironmentManager(max_pooled_envs=pooled), args.env, args.task, args.episodes)
+        later = times[1:] or times
+        print(f"{name:>8}: first episode {times[0] * 1000:8.1f} ms, "
+              f"later episodes {sum(later) / len(later) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark of moving camera frames from an environment process to the GUI.
+
+A producer process plays the environment worker and sends LIBERO-sized
+two-camera frames. The consumer plays the episode recorder: it receives
+every frame in order and copies it into its episode buffer. Frames travel
+either through a ``multiprocessing.Queue``, which pickles every frame, or
+through a shared-memory `FrameRing`, where the producer writes each frame
+once and the consumer reads it in place.
+
+Run from the repository root:
+
+    python -m benchmarks.frame_transport --frames 1000
+"""
+import argparse
+import multiprocessing as mp
+import time
+
+import numpy as np
+
+from utils.shm_ring import FrameRing, frame_spec
+
+
+def make_frame(image_size):
+    rng = np.random.default_rng(0)
+    return {
+        "agent_view": rng.integers(0, 255, (image_size, image_size, 3), dtype=np.uint8),
+        "gripper_view": rng.integers(0, 255, (image_size, image_size, 3), dtype=np.uint8),
+    }
+
+
+def queue_producer(frames, n_frames, image_size):
+    frame = make_frame(image_size)
+    for i in range(n_frames):
+        frame["agent_view"][0, 0, 0] = i % 256
+        frames.put(frame)
+
+
+def ring_producer(ring, n_frames, image_size):
+    frame = make_frame(image_size)
+    for i in range(n_frames):
+        frame["agent_view"][0, 0, 0] = i % 256
+        ring.write(frame)
+    ring.close()
+
+
+def run_queue(args):
+    frames = mp.Queue(maxsize=args.slots)
+    producer = mp.Process(target=queue_producer, args=(frames, args.frames, args.image_size))
+    buffer = np.empty((args.frames, 2, args.image_size, args.image_size, 3), dtype=np.uint8)
+    start = time.perf_counter()
+    producer.start()
+    for i in range(args.frames):
+        frame = frames.get()
+        buffer[i, 0] = frame["agent_view"]
+        buffer[i, 1] = frame["gripper_view"]
+    elapsed = time.perf_counter() - start
+    producer.join()
+    assert buffer[-1, 0, 0, 0, 0] == (args.frames - 1) % 256
+    return elapsed
+
+
+def run_ring(args):
+    ring = FrameRing(frame_spec(make_frame(args.image_size)), n_slots=args.slots)
+    producer = mp.Process(target=ring_producer, args=(ring, args.frames, args.image_size))
+    buffer = np.empty((args.frames, 2, args.image_size, args.image_size, 3), dtype=np.uint8)
+    start = time.perf_counter()
+    producer.start()
+    for i in range(args.frames):
+        while ring.written <= i:
+            time.sleep(0.0001)
+        frame = ring.read(i)
+        buffer[i, 0] = frame["agent_view"]
+        buffer[i, 1] = frame["gripper_view"]
+        ring.release(i)
+    elapsed = time.perf_counter() - start
+    producer.join()
+    ring.close()
+    assert buffer[-1, 0, 0, 0, 0] == (args.frames - 1) % 256
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=1000)
+    parser.add_argument("--image-size", type=int, default=256)
+    parser.add_argument("--slots", type=int, default=8)
+    args = parser.parse_args()
+
+    frame_mb = 2 * args.image_size ** 2 * 3 / 2 ** 20
+    for name, run in [("mp.Queue", run_queue), ("FrameRing", run_ring)]:
+        elapsed = run(args)
+        per_frame = elapsed / args.frames * 1000
+        print(f"{name:>10}: {per_frame:7.3f} ms per frame, {frame_mb * args.frames / elapsed:8.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
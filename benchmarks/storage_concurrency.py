@@ -0,0 +1,104 @@
+"""
+Stress benchmark for concurrent reads while demonstrations are being saved.
+
+One thread keeps saving LIBERO-sized episodes into one task file while reader
+threads list, open and scrub demonstrations of another task. The same load is
+run with the per-file reader/writer locks of `HDF5DataManager` and with a
+single lock shared by all files, as before.
+
+Run from the repository root:
+
+    python -m benchmarks.storage_concurrency --readers 4 --seconds 10
+"""
+import argparse
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from utils.hdf5_utils import HDF5DataManager
+from utils.rwlock import RWLock
+
+
+class GlobalLockDataManager(HDF5DataManager):
+    """Data manager that serializes every file behind one lock."""
+
+    def __init__(self, root_dir, **kwargs):
+        super().__init__(root_dir, **kwargs)
+        self._global_lock = RWLock()
+
+    def _file_lock(self, file_path):
+        return self._global_lock
+
+
+def make_episode(n_steps, image_size):
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 255, (image_size, image_size, 3), dtype=np.uint8)
+    return {
+        "state": [np.zeros(8)] * (n_steps + 1),
+        "action": [np.zeros(7)] * n_steps,
+        "reward": [0.0] * n_steps,
+        "done": [False] * n_steps,
+        "observation": [{"agent_view": np.roll(frame, i, 0), "gripper_view": frame} for i in range(n_steps + 1)],
+        "instruction": "benchmark",
+    }
+
+
+def run(manager_cls, args):
+    with tempfile.TemporaryDirectory() as root:
+        manager = manager_cls(root, codecs={"*": "gzip"})
+        episode = make_episode(args.steps, args.image_size)
+        demo_id = manager.save_demonstration("bench", "read", episode)
+
+        stop = threading.Event()
+        counts = {"save": 0, "list": 0, "frame": 0}
+        counts_lock = threading.Lock()
+
+        def count(key):
+            with counts_lock:
+                counts[key] += 1
+
+        def writer():
+            while not stop.is_set():
+                manager.save_demonstration("bench", "write", episode)
+                count("save")
+
+        def reader(seed):
+            rng = np.random.default_rng(seed)
+            while not stop.is_set():
+                manager.get_demonstration_list("bench", "read")
+                count("list")
+                with manager.open_demonstration("bench", "read", demo_id) as handle:
+                    for i in rng.integers(0, len(handle), 8):
+                        handle.frame(int(i))
+                        count("frame")
+
+        threads = [threading.Thread(target=writer)]
+        threads += [threading.Thread(target=reader, args=(i,)) for i in range(args.readers)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+    return {key: value / elapsed for key, value in counts.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--image-size", type=int, default=256)
+    args = parser.parse_args()
+
+    for name, manager_cls in [("global lock", GlobalLockDataManager), ("per-file rw", HDF5DataManager)]:
+        rates = run(manager_cls, args)
+        print(f"{name:>12}: " + ", ".join(f"{key} {rate:8.1f}/s" for key, rate in rates.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -30,6 +30,26 @@ class BaseEnv(ABC):
         """Close the environment."""
         pass
 
+    def activate(self):
+        """
+        Prepare the environment to be stepped on the calling thread.
+
+        Called when a pooled environment is reused on a new worker thread.
+        Environments that render offscreen make their rendering context
+        current here.
+        """
+        pass
+
+    def deactivate(self):
+        """
+        Release the environment from the calling thread, so `activate` can
+        take it over on another one.
+
+        Environments that render offscreen release their rendering context
+        here.
+        """
+        pass
+
     @property
     @abstractmethod
     def action_space(self):
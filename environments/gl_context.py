@@ -0,0 +1,21 @@
+import sys
+
+
+def release_current_context():
+    """
+    Unbind the OpenGL context current on the calling thread.
+
+    EGL and GLFW refuse to make a context current on one thread while it is
+    still current on another, so an environment handed over between threads
+    releases its context on the old thread first. Only backends that were
+    already loaded by a renderer are touched; OSMesa contexts need no release.
+    """
+    if "OpenGL.EGL" in sys.modules:
+        from OpenGL import EGL
+        display = EGL.eglGetCurrentDisplay()
+        if display != EGL.EGL_NO_DISPLAY:
+            EGL.eglMakeCurrent(display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, EGL.EGL_NO_CONTEXT)
+    if "glfw" in sys.modules:
+        import glfw
+        if glfw.get_current_context():
+            glfw.make_context_current(None)
@@ -7,6 +7,7 @@ from libero.libero.envs import OffScreenRenderEnv
 from libero.libero import get_libero_path
 import gym
 from ..base_env import BaseEnv
+from ..gl_context import release_current_context
 
 
 def quat2axisangle(quat):
@@ -120,55 +121,61 @@ class LIBEROEnv(BaseEnv):
             low=-np.inf, high=np.inf, shape=(8,), dtype=np.float32
         )
         
+    def activate(self):
+        # robosuite makes its offscreen context current only when it is created.
+        sim = getattr(getattr(self.env, "env", None), "sim", None)
+        context = getattr(sim, "_render_context_offscreen", None)
+        if context is not None:
+            context.gl_ctx.make_current()
+
+    def deactivate(self):
+        release_current_context()
+
     def close(self):
         return self.env.close()
 
-import sys
+import re
 
 # "libero_10", "libero_90", "libero_spatial", "libero_object", "libero_goal"
 SUITES_TO_GENERATE = ["libero_object"]  # Add more suites as needed
 
-# Store all generated class names for __all__
-__all__ = []
+_TASK_CLASS_NAME = re.compile(r"^(?P<suite>\w+)_task_(?P<task_id>\d+)$")
+_task_classes = {}
 
-current_module = sys.modules[__name__]
 
-for suite_name in SUITES_TO_GENERATE:
-    try:
-        benchmark_dict = benchmark.get_benchmark_dict()
-        task_suite = benchmark_dict[suite_name]()
-        num_tasks = task_suite.n_tasks
-    except Exception as e:
-        print(f"Warning: Failed to load suite '{suite_name}': {e}")
-        continue
-
-    for task_id in range(num_tasks):
-        task = task_suite.get_task(task_id)
-        class_name = f"{suite_name}_task_{task_id}"
-
-        # Avoid duplicates (theoretically unnecessary, but just in case)
-        if hasattr(current_module, class_name):
-            continue
-
-        # Capture the current suite_name and task_id in a closure
-        def make_init(ts_name, t_id):
-            def __init__(self, max_steps=500):
-                LIBEROEnv.__init__(self, ts_name, t_id, max_steps)
-            return __init__
-
-        new_class = type(
-            class_name,
-            (LIBEROEnv,),
-            {
-                "__init__": make_init(suite_name, task_id),
-                "__module__": __name__,  # Important: let the class know which module it belongs to
-                "__doc__": f"LIBERO task: {suite_name} - {task.name}\n{task.language}"
-            }
-        )
+def make_task_class(suite_name, task_id):
+    """
+    Create the `LIBEROEnv` subclass of one task of a suite.
+
+    The suite is instantiated here, so importing this module does not load
+    any benchmark suite.
+    """
+    task = benchmark.get_benchmark_dict()[suite_name]().get_task(task_id)
+
+    def __init__(self, max_steps=500):
+        LIBEROEnv.__init__(self, suite_name, task_id, max_steps)
+
+    return type(
+        f"{suite_name}_task_{task_id}",
+        (LIBEROEnv,),
+        {
+            "__init__": __init__,
+            "__module__": __name__,  # Important: let the class know which module it belongs to
+            "__doc__": f"LIBERO task: {suite_name} - {task.name}\n{task.language}",
+            "task_description": task.language,
+        }
+    )
+
+
+def __getattr__(name):
+    # Task classes such as `libero_object_task_0` are created on first access.
+    match = _TASK_CLASS_NAME.match(name)
+    if match is None or match["suite"] not in SUITES_TO_GENERATE:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    if name not in _task_classes:
+        _task_classes[name] = make_task_class(match["suite"], int(match["task_id"]))
+    return _task_classes[name]
 
-        # Bind the new class to the current module
-        setattr(current_module, class_name, new_class)
-        __all__.append(class_name)
 
 # # debugging
 # print(f"[libero_tasks] Generated {len(__all__)} task classes.")
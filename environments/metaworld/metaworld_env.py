@@ -4,6 +4,7 @@ import metaworld
 import gymnasium as gym
 from gymnasium.envs.mujoco import MujocoRenderer
 from ..base_env import BaseEnv
+from ..gl_context import release_current_context
 
 
 class MetaWorldEnv(BaseEnv):
@@ -46,7 +47,17 @@ class MetaWorldEnv(BaseEnv):
         return {"agent_view": np.array(self.env.render())[::-1, ::-1],
                 "gripper_view": np.array(self.hand_renderer.render("rgb_array"))}
 
+    def activate(self):
+        # Gymnasium only makes a viewer's context current when a renderer switches viewers.
+        for renderer in (self.env.unwrapped.mujoco_renderer, self.hand_renderer):
+            for viewer in renderer._viewers.values():
+                viewer.make_context_current()
+
+    def deactivate(self):
+        release_current_context()
+
     def close(self):
+        self.hand_renderer.close()
         self.env.close()
 
     @property
@@ -22,6 +22,8 @@ def reset_cube_description():
 class RM65(BaseEnv):
     task_description = ""
     default_action = 0
+    # Resetting moves the arm, so it is never done ahead of time.
+    prewarm = False
     _instance = None
 
     def __new__(cls, *args: Any, **kwargs: Any) -> 'RM65':
@@ -78,6 +80,8 @@ class RM65(BaseEnv):
         
     def close(self):
         self.cap.release()
+        # The next instance connects again instead of reusing this closed one.
+        type(self)._instance = None
 
     @property
     def action_space(self):
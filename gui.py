@@ -1,3 +1,7 @@
+import time
+_START_TIME = time.perf_counter()
+
+import argparse
 import os
 import tkinter as tk
 from tkinter import ttk
@@ -5,6 +9,11 @@ from tkinter import ttk
 from app.gui import ImitationLearningGUI
 from app.environment import EnvironmentManager
 from utils.hdf5_utils import HDF5DataManager
+from utils.startup_profile import StartupProfiler, profile_imports
+
+# The modules imported above, whose import time --profile-startup breaks down.
+STARTUP_MODULES = ["tkinter", "app.gui", "app.environment", "utils.hdf5_utils"]
+
 
 def main():
     """
@@ -14,7 +23,23 @@ def main():
     Then it creates an instance of EnvironmentManager and HDF5DataManager.
     Finally, it creates an instance of ImitationLearningGUI and starts the main loop of the application.
 
+    With ``--profile-startup [PATH]``, the import time of every module, the
+    time of the environment registration and of the Tk widget construction,
+    and the latency of the first frame after pressing ``q`` are written to a
+    JSON report, by default ``startup_profile.json``.
+
     """
+    parser = argparse.ArgumentParser(description="Collect and manage demonstrations.")
+    parser.add_argument("--profile-startup", nargs="?", const="startup_profile.json", default=None,
+                        metavar="PATH", help="write a startup timing report to PATH")
+    parser.add_argument("--isolate-envs", action="store_true",
+                        help="run every environment in a worker process of its own")
+    args = parser.parse_args()
+    profiler = None
+    if args.profile_startup is not None:
+        profiler = StartupProfiler(args.profile_startup, _START_TIME)
+        profiler.mark("imports")
+
     root = tk.Tk()
     root.config(bg="white")
     style = ttk.Style(root)
@@ -35,9 +60,27 @@ def main():
     style.configure("TNotebook", background="white")
     style.configure("TNotebook.Tab", background="white", foreground="black", font=font_settings)
 
-    env_manager = EnvironmentManager()
-    data_manager = HDF5DataManager(out_dir)
-    app = ImitationLearningGUI(root, env_manager, data_manager)
+    if profiler is None:
+        env_manager = EnvironmentManager(isolated=args.isolate_envs)
+        data_manager = HDF5DataManager(out_dir)
+        app = ImitationLearningGUI(root, env_manager, data_manager)
+        root.mainloop()
+        return
+
+    with profiler.phase("env_registration"):
+        env_manager = EnvironmentManager(isolated=args.isolate_envs)
+    with profiler.phase("data_manager"):
+        data_manager = HDF5DataManager(out_dir)
+    with profiler.phase("tk_construction"):
+        app = ImitationLearningGUI(root, env_manager, data_manager)
+        root.update()
+    profiler.mark("window_ready")
+    profiler.report["environments"] = {env_name: len(env_manager.get_available_tasks(env_name))
+                                       for env_name in env_manager.get_available_environments()}
+    profiler.report["imports"] = profile_imports(STARTUP_MODULES)
+    profiler.write()
+    print(f"Startup profile written to {profiler.path}, press q to add the first-frame latency")
+    app.demonstration_collector.on_first_frame = profiler.first_frame
     root.mainloop()
 
 if __name__ == "__main__":
@@ -0,0 +1,217 @@
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+
+class EpisodeCatalog:
+    def __init__(self, db_path):
+        """
+        SQLite index of the demonstrations stored by a data manager.
+
+        Listing, paging and counting demonstrations only query this index, so
+        they never have to open the HDF5 files. Every update runs in its own
+        transaction, so the index is never left half written.
+
+        Parameters
+        ----------
+        db_path : str
+            The path of the SQLite database file.
+        """
+        self.db_path = db_path
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS episodes ("
+                " env_name TEXT NOT NULL,"
+                " task_name TEXT NOT NULL,"
+                " demo_id TEXT NOT NULL,"
+                " length INTEGER NOT NULL,"
+                " instruction TEXT NOT NULL,"
+                " success INTEGER NOT NULL,"
+                " nbytes INTEGER NOT NULL,"
+                " created REAL NOT NULL,"
+                " file TEXT NOT NULL DEFAULT '',"
+                " PRIMARY KEY (env_name, task_name, demo_id))"
+            )
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(episodes)")]
+            if "file" not in columns:
+                conn.execute("ALTER TABLE episodes ADD COLUMN file TEXT NOT NULL DEFAULT ''")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS files ("
+                " env_name TEXT NOT NULL,"
+                " task_name TEXT NOT NULL,"
+                " file TEXT NOT NULL,"
+                " deleted INTEGER NOT NULL DEFAULT 0,"
+                " PRIMARY KEY (env_name, task_name, file))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS indexed ("
+                " env_name TEXT NOT NULL,"
+                " task_name TEXT NOT NULL,"
+                " PRIMARY KEY (env_name, task_name))"
+            )
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per call keeps the catalog usable from any thread.
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def add(self, env_name, task_name, demo_id, length, instruction="", success=False, nbytes=0, created=None, file=""):
+        """
+        Record a saved demonstration, replacing an existing entry with the same id.
+
+        `file` is the path of the HDF5 file holding the demonstration, relative
+        to the data directory.
+        """
+        with self._connect() as conn:
+            self._insert(conn, env_name, task_name, dict(
+                demo_id=demo_id, length=length, instruction=instruction, success=success,
+                nbytes=nbytes, created=created, file=file
+            ))
+
+    def _insert(self, conn, env_name, task_name, entry):
+        conn.execute(
+            "INSERT OR REPLACE INTO episodes"
+            " (env_name, task_name, demo_id, length, instruction, success, nbytes, created, file)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (env_name, task_name, entry["demo_id"], int(entry["length"]), entry.get("instruction", ""),
+             int(bool(entry.get("success", False))), int(entry.get("nbytes", 0)),
+             entry.get("created") or time.time(), entry.get("file", ""))
+        )
+
+    def remove(self, env_name, task_name, demo_id):
+        """Forget a deleted demonstration and count the hole it leaves in its file."""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO files (env_name, task_name, file)"
+                " SELECT env_name, task_name, file FROM episodes"
+                " WHERE env_name = ? AND task_name = ? AND demo_id = ?",
+                (env_name, task_name, demo_id)
+            )
+            conn.execute(
+                "UPDATE files SET deleted = deleted + 1 WHERE env_name = ? AND task_name = ? AND file = ("
+                " SELECT file FROM episodes WHERE env_name = ? AND task_name = ? AND demo_id = ?)",
+                (env_name, task_name, env_name, task_name, demo_id)
+            )
+            conn.execute(
+                "DELETE FROM episodes WHERE env_name = ? AND task_name = ? AND demo_id = ?",
+                (env_name, task_name, demo_id)
+            )
+
+    def replace_all(self, env_name, task_name, entries):
+        """
+        Replace every entry of an env/task with `entries` and mark it as indexed.
+
+        Parameters
+        ----------
+        env_name : str
+        task_name : str
+        entries : list of dict
+            Keyword arguments of `add` without `env_name` and `task_name`.
+        """
+        with self._connect() as conn:
+            conn.execute("DELETE FROM episodes WHERE env_name = ? AND task_name = ?", (env_name, task_name))
+            for entry in entries:
+                self._insert(conn, env_name, task_name, entry)
+            conn.execute("INSERT OR IGNORE INTO indexed VALUES (?, ?)", (env_name, task_name))
+
+    def file_stats(self, env_name, task_name):
+        """
+        Return per-file statistics of an env/task.
+
+        Returns
+        -------
+        dict
+            Maps each file to its number of episodes, the bytes stored by
+            them and the number of episodes deleted since it was compacted.
+        """
+        stats = {}
+        with self._connect() as conn:
+            for file, episodes, live_bytes in conn.execute(
+                "SELECT file, COUNT(*), SUM(nbytes) FROM episodes"
+                " WHERE env_name = ? AND task_name = ? GROUP BY file",
+                (env_name, task_name)
+            ):
+                stats[file] = {"episodes": episodes, "live_bytes": live_bytes, "deleted": 0}
+            for file, deleted in conn.execute(
+                "SELECT file, deleted FROM files WHERE env_name = ? AND task_name = ?", (env_name, task_name)
+            ):
+                stats.setdefault(file, {"episodes": 0, "live_bytes": 0, "deleted": 0})["deleted"] = deleted
+        return stats
+
+    def reset_deleted(self, env_name, task_name, file):
+        """Reset the deleted episode count of a file after it was compacted."""
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM files WHERE env_name = ? AND task_name = ? AND file = ?", (env_name, task_name, file)
+            )
+
+    def is_indexed(self, env_name, task_name):
+        """Return True if the env/task was indexed since the catalog was created."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM indexed WHERE env_name = ? AND task_name = ?", (env_name, task_name)
+            ).fetchone()
+        return row is not None
+
+    def list(self, env_name, task_name, page=1, page_size=10):
+        """
+        Return one page of demo ids, sorted like the groups of the HDF5 file.
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT demo_id FROM episodes WHERE env_name = ? AND task_name = ?"
+                " ORDER BY demo_id LIMIT ? OFFSET ?",
+                (env_name, task_name, page_size, (page - 1) * page_size)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def count(self, env_name, task_name):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT COUNT(*) FROM episodes WHERE env_name = ? AND task_name = ?", (env_name, task_name)
+            ).fetchone()
+        return row[0]
+
+    def entries(self, env_name, task_name):
+        """
+        Return every catalog entry of an env/task as dicts, sorted by demo id.
+        """
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(
+                "SELECT * FROM episodes WHERE env_name = ? AND task_name = ? ORDER BY demo_id",
+                (env_name, task_name)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get(self, env_name, task_name, demo_id):
+        """
+        Return the catalog entry of a demonstration as a dict, or None if unknown.
+        """
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute(
+                "SELECT * FROM episodes WHERE env_name = ? AND task_name = ? AND demo_id = ?",
+                (env_name, task_name, demo_id)
+            ).fetchone()
+        return dict(row) if row is not None else None
+
+
+def demo_created_time(demo_id, default=None):
+    """Parse the creation time encoded in a timestamp based demo id."""
+    try:
+        return datetime.strptime(demo_id[:15], "%Y%m%d_%H%M%S").timestamp()
+    except ValueError:
+        return default
+
+
+def catalog_path(root_dir):
+    """Return the catalog location for a data directory."""
+    return os.path.join(root_dir, "catalog.sqlite")
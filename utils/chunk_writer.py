@@ -0,0 +1,105 @@
+import itertools
+import zlib
+import numpy as np
+from utils.compression import parse_codec
+from utils.frame_codecs import encoder_pool
+
+
+# Codecs whose chunks can be compressed outside of HDF5. Gzip is the standard
+# deflate filter, so the written files stay readable by stock h5py.
+PARALLEL_CODECS = ("gzip",)
+
+
+def is_parallel_codec(codec):
+    """Return True if chunks of `codec` can be compressed by `write_chunked`."""
+    return str(codec).lower().split(":")[0] in PARALLEL_CODECS
+
+
+def can_write_chunked(data):
+    """Return True if `data` is a non-empty numeric array `write_chunked` can store."""
+    return isinstance(data, np.ndarray) and data.ndim > 0 and data.size > 0 and data.dtype.kind in "biuf"
+
+
+def _compress_chunk(block, chunks, level):
+    if block.shape != chunks:
+        # Edge chunks are stored at full size, HDF5 ignores the padding on read.
+        padded = np.zeros(chunks, dtype=block.dtype)
+        padded[tuple(slice(0, n) for n in block.shape)] = block
+        block = padded
+    return zlib.compress(np.ascontiguousarray(block).tobytes(), level)
+
+
+def _level(codec):
+    _, options = parse_codec(codec)
+    return int(options[0]) if options else 4
+
+
+def compress_chunks(data, codec, chunks):
+    """
+    Compress the chunks of `data` in the encoder pool for `write_chunked`,
+    e.g. before the file is locked.
+
+    Parameters
+    ----------
+    data : numpy.ndarray
+        The data, see `can_write_chunked`.
+    codec : str
+        A ``"gzip[:<level>]"`` codec specification.
+    chunks : tuple
+        The chunk shape.
+
+    Returns
+    -------
+    list of tuple
+        The offset and compressed bytes of every chunk.
+    """
+    level = _level(codec)
+    if data.dtype.byteorder == ">":
+        data = data.astype(data.dtype.newbyteorder("="))
+    offsets = list(itertools.product(*(range(0, n, c) for n, c in zip(data.shape, chunks))))
+    blocks = (data[tuple(slice(o, o + c) for o, c in zip(offset, chunks))] for offset in offsets)
+    return list(zip(offsets, encoder_pool().map(_compress_chunk, blocks, [chunks] * len(offsets),
+                                                [level] * len(offsets))))
+
+
+def write_chunked(group, key, data, codec, chunks=None, compressed=None):
+    """
+    Create a compressed dataset, compressing its chunks in the encoder pool.
+
+    h5py compresses chunks one at a time while holding the GIL. Here every
+    chunk is deflated in the shared pool, where zlib runs without the GIL,
+    and the compressed bytes are stored with ``write_direct_chunk``. The
+    layout and filters are the same as with ``create_dataset``.
+
+    Parameters
+    ----------
+    group : h5py.Group
+        The group to create the dataset in.
+    key : str
+        The dataset name.
+    data : numpy.ndarray
+        The data, see `can_write_chunked`.
+    codec : str
+        A ``"gzip[:<level>]"`` codec specification.
+    chunks : tuple, optional
+        The chunk shape, guessed by h5py by default.
+    compressed : list of tuple, optional
+        The chunks already compressed by `compress_chunks` with `chunks`.
+
+    Returns
+    -------
+    h5py.Dataset
+        The created dataset.
+    """
+    if data.dtype.byteorder == ">":
+        data = data.astype(data.dtype.newbyteorder("="))
+    dataset = group.create_dataset(
+        key, shape=data.shape, dtype=data.dtype, chunks=chunks or True,
+        compression="gzip", compression_opts=_level(codec)
+    )
+    if compressed is None:
+        compressed = compress_chunks(data, codec, dataset.chunks)
+    for offset, chunk in compressed:
+        dataset.id.write_direct_chunk(offset, chunk)
+    dataset.attrs["codec"] = codec
+    return dataset
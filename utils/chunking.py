@@ -0,0 +1,112 @@
+import fnmatch
+
+
+# Camera frames are read one at a time by playback and shuffled training
+# loaders, so every frame gets its own chunk. Low-dimensional arrays are read
+# in runs and are tiny, so they are chunked in blocks of time steps.
+DEFAULT_CHUNK_POLICY = {
+    "observation/*": "frame",
+    "*": "time:256",
+}
+
+
+def parse_layout(layout):
+    """
+    Parse a chunk layout specification into its name and block length.
+
+    Supported specifications are ``"auto"`` (the chunk shape guessed by h5py),
+    ``"frame"`` (one time step per chunk) and ``"time:<n>"`` (blocks of `n`
+    time steps). Chunks always span whole time steps except for ``"auto"``.
+
+    Parameters
+    ----------
+    layout : str
+        The layout specification.
+
+    Returns
+    -------
+    tuple
+        The layout name and the number of time steps per chunk, None for
+        ``"auto"``.
+    """
+    name, *options = str(layout).lower().split(":")
+    if name == "auto" and not options:
+        return name, None
+    if name == "frame" and not options:
+        return name, 1
+    if name == "time" and len(options) == 1 and options[0].isdigit() and int(options[0]) > 0:
+        return name, int(options[0])
+    raise ValueError(f"Unknown chunk layout '{layout}'")
+
+
+def resolve_layout(key, policy):
+    """
+    Pick the chunk layout for a dataset key.
+
+    Parameters
+    ----------
+    key : str
+        The dataset key inside the demo group, e.g. ``"observation/agent_view"``.
+    policy : dict
+        Mapping of glob patterns to layout specifications. The first matching
+        pattern wins.
+
+    Returns
+    -------
+    str
+        The layout specification, ``"auto"`` if no pattern matches.
+    """
+    for pattern, layout in policy.items():
+        if fnmatch.fnmatchcase(key, pattern):
+            return layout
+    return "auto"
+
+
+def make_chunk_policy(layouts=None):
+    """
+    Build a chunk policy with user overrides taking precedence over the defaults.
+
+    Parameters
+    ----------
+    layouts : dict, optional
+        Mapping of glob patterns to layout specifications.
+
+    Returns
+    -------
+    dict
+        The validated chunk policy.
+    """
+    policy = dict(layouts or {})
+    for pattern, layout in DEFAULT_CHUNK_POLICY.items():
+        policy.setdefault(pattern, layout)
+    for layout in policy.values():
+        parse_layout(layout)
+    return policy
+
+
+def chunk_shape(layout, shape, resizable=False):
+    """
+    Return the chunk shape of a dataset for a layout.
+
+    Parameters
+    ----------
+    layout : str
+        The layout specification, see `parse_layout`.
+    shape : tuple
+        The dataset shape, time first.
+    resizable : bool, optional
+        Whether the dataset grows along time. Otherwise blocks are capped at
+        the number of time steps.
+
+    Returns
+    -------
+    tuple or bool
+        The chunk shape, or True to let h5py guess it.
+    """
+    _, steps = parse_layout(layout)
+    # h5py rejects chunks larger than an empty fixed-size dataset.
+    if steps is None or len(shape) == 0 or (not resizable and 0 in shape):
+        return True
+    if not resizable:
+        steps = min(steps, shape[0])
+    return (steps,) + tuple(shape[1:])
@@ -0,0 +1,176 @@
+import fnmatch
+
+try:
+    import hdf5plugin
+    IMPORT_HDF5PLUGIN = True
+except ImportError:
+    IMPORT_HDF5PLUGIN = False
+
+
+# Codecs that need the filters registered by `hdf5plugin` to write and read.
+PLUGIN_CODECS = ("blosc", "lz4")
+
+# Codecs that encode camera frames themselves instead of using an HDF5 filter,
+# see `utils.frame_codecs`. Image codecs store every frame as its own blob.
+IMAGE_CODECS = ("png", "jpeg")
+FRAME_CODECS = ("video",) + IMAGE_CODECS
+
+# Video codecs usable with ``"video:<fourcc>"`` and their container format.
+# FFV1 and HuffYUV are lossless, MJPEG is near-lossless at high quality.
+VIDEO_FOURCCS = {"ffv1": ".mkv", "hfyu": ".avi", "mjpg": ".avi"}
+
+# Camera frames are compressed with gzip like before codecs were configurable,
+# so files stay readable by any HDF5 reader whatever is installed where they
+# were written; plugin codecs are opt-in through ``codecs=``. Low-dimensional
+# arrays are tiny and are stored uncompressed.
+DEFAULT_CODEC_POLICY = {
+    "observation/*": "gzip",
+    "*": "none",
+}
+
+
+def parse_codec(codec):
+    """
+    Parse a codec specification into its name and options.
+
+    Supported specifications are ``"none"``, ``"lzf"``, ``"gzip"`` or
+    ``"gzip:<level>"``, ``"lz4"``, ``"blosc"`` or
+    ``"blosc:<cname>[:<clevel>]"`` and, for camera frames,
+    ``"video[:<fourcc>[:<quality>]]"``, ``"png[:<level>]"`` and
+    ``"jpeg[:<quality>]"``.
+
+    Parameters
+    ----------
+    codec : str
+        The codec specification.
+
+    Returns
+    -------
+    tuple
+        The codec name and a list of its options.
+    """
+    name, *options = str(codec).lower().split(":")
+    if name == "none" or name == "lzf" or name == "lz4":
+        valid = not options
+    elif name == "gzip":
+        valid = len(options) <= 1 and all(o.isdigit() and int(o) <= 9 for o in options)
+    elif name == "blosc":
+        valid = len(options) <= 2 and all(o.isdigit() for o in options[1:])
+    elif name == "video":
+        valid = len(options) <= 2 and (not options or options[0] in VIDEO_FOURCCS) and \
+            all(o.isdigit() and int(o) <= 100 for o in options[1:])
+    elif name == "png":
+        valid = len(options) <= 1 and all(o.isdigit() and int(o) <= 9 for o in options)
+    elif name == "jpeg":
+        valid = len(options) <= 1 and all(o.isdigit() and 1 <= int(o) <= 100 for o in options)
+    else:
+        valid = False
+    if not valid:
+        raise ValueError(f"Unknown compression codec '{codec}'")
+    if name in PLUGIN_CODECS and not IMPORT_HDF5PLUGIN:
+        raise ValueError(f"Compression codec '{codec}' requires the 'hdf5plugin' package")
+    return name, options
+
+
+def codec_kwargs(codec):
+    """
+    Return the `create_dataset` keyword arguments for a codec.
+
+    Parameters
+    ----------
+    codec : str
+        The codec specification, see `parse_codec`.
+
+    Returns
+    -------
+    dict
+        Keyword arguments selecting the compression filter. Empty for ``"none"``
+        and frame codecs, whose data is already encoded.
+    """
+    name, options = parse_codec(codec)
+    if name == "none" or name in FRAME_CODECS:
+        return {}
+    if name == "lzf":
+        return {"compression": "lzf"}
+    if name == "gzip":
+        return {"compression": "gzip", "compression_opts": int(options[0]) if options else 4}
+    if name == "lz4":
+        return dict(hdf5plugin.LZ4())
+    cname = options[0] if options else "lz4"
+    clevel = int(options[1]) if len(options) > 1 else 5
+    return dict(hdf5plugin.Blosc(cname=cname, clevel=clevel, shuffle=hdf5plugin.Blosc.SHUFFLE))
+
+
+def is_video_codec(codec):
+    """Return True if `codec` encodes a camera stream as one video."""
+    return str(codec).lower().split(":")[0] == "video"
+
+
+def is_image_codec(codec):
+    """Return True if `codec` encodes every camera frame as its own image."""
+    return str(codec).lower().split(":")[0] in IMAGE_CODECS
+
+
+def resolve_codec(key, policy):
+    """
+    Pick the codec for a dataset key.
+
+    Parameters
+    ----------
+    key : str
+        The dataset key inside the demo group, e.g. ``"observation/agent_view"``.
+    policy : dict
+        Mapping of glob patterns to codec specifications. The first matching
+        pattern wins.
+
+    Returns
+    -------
+    str
+        The codec specification, ``"none"`` if no pattern matches.
+    """
+    for pattern, codec in policy.items():
+        if fnmatch.fnmatchcase(key, pattern):
+            return codec
+    return "none"
+
+
+def make_codec_policy(codecs=None):
+    """
+    Build a codec policy with user overrides taking precedence over the defaults.
+
+    Parameters
+    ----------
+    codecs : dict, optional
+        Mapping of glob patterns to codec specifications.
+
+    Returns
+    -------
+    dict
+        The validated codec policy.
+    """
+    policy = dict(codecs or {})
+    for pattern, codec in DEFAULT_CODEC_POLICY.items():
+        policy.setdefault(pattern, codec)
+    for codec in policy.values():
+        parse_codec(codec)
+    return policy
+
+
+def check_readable(dataset):
+    """
+    Raise a clear error if a dataset was written with an unavailable codec.
+
+    Parameters
+    ----------
+    dataset : h5py.Dataset
+        The dataset about to be read.
+    """
+    codec = dataset.attrs.get("codec")
+    if codec is None:
+        return
+    if isinstance(codec, bytes):
+        codec = codec.decode()
+    if codec.split(":")[0] in PLUGIN_CODECS and not IMPORT_HDF5PLUGIN:
+        raise RuntimeError(
+            f"Dataset '{dataset.name}' is compressed with '{codec}', install 'hdf5plugin' to read it"
+        )
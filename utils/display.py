@@ -0,0 +1,189 @@
+import tkinter as tk
+import cv2
+import numpy as np
+from PIL import Image, ImageTk
+from utils.rate_control import RateScheduler
+
+
+class CanvasImage:
+    def __init__(self, canvas, x=0, y=0):
+        """
+        A single image item on a canvas that is updated in place.
+
+        The first frame creates the canvas item and its `PhotoImage`. Later
+        frames of the same size are pasted into that `PhotoImage`, so no
+        canvas items or Tk images pile up over an episode.
+
+        Parameters
+        ----------
+        canvas : tk.Canvas
+            The canvas to draw on.
+        x, y : int, optional
+            The position of the top left corner of the image.
+        """
+        self.canvas = canvas
+        self.x = x
+        self.y = y
+        self.item = None
+        self.photo = None
+
+    def show(self, img):
+        """
+        Display a PIL image.
+
+        Parameters
+        ----------
+        img : PIL.Image.Image
+        """
+        if self.photo is not None and self.photo.width() == img.width and self.photo.height() == img.height:
+            self.photo.paste(img)
+            return
+        self.photo = ImageTk.PhotoImage(img)
+        if self.item is None:
+            self.item = self.canvas.create_image(self.x, self.y, anchor=tk.NW, image=self.photo)
+        else:
+            self.canvas.itemconfig(self.item, image=self.photo)
+
+    def clear(self):
+        """Remove the image from the canvas."""
+        if self.item is not None:
+            self.canvas.delete(self.item)
+        self.item = None
+        self.photo = None
+
+
+class FrameCompositor:
+    def __init__(self, tile_size=400):
+        """
+        Lay out camera frames side by side in a reusable mosaic buffer.
+
+        Every camera is scaled to fit a square tile, centered on black, like
+        `utils.tools.resize_and_pad_to_square`. The tile geometry is computed
+        once per camera configuration, and frames are resized by OpenCV
+        straight into a preallocated mosaic, which is reused for every frame.
+
+        Parameters
+        ----------
+        tile_size : int, optional
+            The side of the square tile of each camera, by default 400.
+        """
+        self.tile_size = tile_size
+        self._signature = None
+        self._layout = []
+        self.mosaic = None
+
+    def _prepare(self, frames):
+        signature = tuple((key, np.shape(value)) for key, value in frames.items())
+        if signature == self._signature:
+            return
+        self._layout = []
+        for i, (key, shape) in enumerate(signature):
+            height, width = shape[:2]
+            scale = self.tile_size / max(width, height)
+            new_width, new_height = int(width * scale), int(height * scale)
+            left = i * self.tile_size + (self.tile_size - new_width) // 2
+            top = (self.tile_size - new_height) // 2
+            # Area averaging is the cheap filter that does not alias when shrinking.
+            interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+            region = (slice(top, top + new_height), slice(left, left + new_width))
+            self._layout.append((key, (new_width, new_height), region, interpolation))
+        self.mosaic = np.zeros((self.tile_size, self.tile_size * len(signature), 3), dtype=np.uint8)
+        self._signature = signature
+
+    def compose(self, frame):
+        """
+        Draw a frame into the mosaic.
+
+        Parameters
+        ----------
+        frame : numpy.ndarray or dict
+            One RGB, RGBA or grayscale uint8 image, or a dict of them.
+
+        Returns
+        -------
+        numpy.ndarray
+            The mosaic. It is overwritten by the next call.
+        """
+        frames = frame if isinstance(frame, dict) else {"": frame}
+        self._prepare(frames)
+        for key, size, region, interpolation in self._layout:
+            image = np.asarray(frames[key])
+            if image.ndim == 3 and image.shape[2] == 4:
+                image = image[..., :3]
+            target = self.mosaic[region]
+            if image.ndim == 3 and image.shape[2] == 3:
+                cv2.resize(image, size, dst=target, interpolation=interpolation)
+            else:
+                target[...] = cv2.resize(image, size, interpolation=interpolation).reshape(target.shape[:2] + (-1,))
+        return self.mosaic
+
+    def compose_image(self, frame):
+        """Like `compose`, as a PIL image sharing the mosaic buffer."""
+        return Image.fromarray(self.compose(frame))
+
+
+class DisplayThrottle:
+    def __init__(self, max_hz=30):
+        """
+        Refresh a display at most `max_hz` times per second from a
+        `LatestValue` that a producer publishes to at its own rate.
+
+        Each refresh shows only the newest value. Values published since the
+        previous refresh were never shown and count as dropped, so a display
+        that falls behind skips frames instead of slowing the producer.
+
+        Parameters
+        ----------
+        max_hz : float, optional
+            The maximum refresh rate, by default 30.
+        """
+        self.rate = RateScheduler(max_hz)
+        self.version = 0
+        self.shown = 0
+        self.dropped = 0
+
+    def reset(self):
+        """Start counting for a new producer."""
+        self.rate.start()
+        self.version = 0
+        self.shown = 0
+        self.dropped = 0
+
+    def poll(self, latest):
+        """
+        Take the newest value of `latest` if it was not shown yet.
+
+        Parameters
+        ----------
+        latest : LatestValue
+            The value published by the producer.
+
+        Returns
+        -------
+        object
+            The value to show, or None if nothing new was published.
+        """
+        version, value = latest.get_newer(self.version)
+        if value is None:
+            return None
+        self.dropped += version - self.version - 1
+        self.shown += 1
+        self.version = version
+        return value
+
+    def next_delay_ms(self):
+        """The delay in milliseconds until the next refresh, for Tk's ``after``."""
+        return self.rate.tick_ms()
+
+    @property
+    def drop_ratio(self):
+        """The fraction of published values that were never shown."""
+        total = self.shown + self.dropped
+        return self.dropped / total if total else 0.0
+
+    def status(self):
+        """A one line summary for a status label."""
+        elapsed = self.rate.elapsed()
+        fps = self.shown / elapsed if elapsed > 0 else 0.0
+        return (f"Display: {fps:.1f} / {self.rate.hz:g} fps, "
+                f"{self.dropped} dropped ({self.drop_ratio:.0%})")
@@ -0,0 +1,186 @@
+import tempfile
+import numpy as np
+
+
+class EpisodeBuffer:
+    def __init__(self, max_steps=None, initial_capacity=64, memory_budget=None, spill_dir=None):
+        """
+        Columnar in-memory buffer of one episode.
+
+        Every key recorded by `append` is kept in one contiguous array that
+        is preallocated and grown geometrically, instead of a list holding
+        one small array per step. `to_dict` returns views of the recorded
+        rows, which `HDF5DataManager.save_demonstration` writes without
+        stacking them into another copy.
+
+        Parameters
+        ----------
+        max_steps : int, optional
+            The episode length limit of the task. Columns are allocated for
+            ``max_steps + 1`` rows up front and never reallocated unless the
+            episode runs longer. Pages that are never written are not
+            backed by memory.
+        initial_capacity : int, optional
+            The number of rows allocated at first without `max_steps`, by
+            default 64. Columns double in size whenever they are full.
+        memory_budget : int, optional
+            The number of recorded bytes kept in memory. Once the episode
+            grows past it, all columns are moved to memory-mapped temporary
+            files, which the OS can write back to disk instead of swapping.
+            Saving reads the columns straight from the files.
+        spill_dir : str, optional
+            The directory of the spill files, the system temp dir by default.
+        """
+        self.max_steps = max_steps
+        self.initial_capacity = max_steps + 1 if max_steps is not None else initial_capacity
+        self.memory_budget = memory_budget
+        self.spill_dir = spill_dir
+        self._columns = {}
+        self._lengths = {}
+        self._spill_files = {}
+
+    def append(self, step):
+        """
+        Append one step.
+
+        Parameters
+        ----------
+        step : dict
+            The values recorded at this step, e.g. ``state``, ``action``,
+            ``reward``, ``done`` and ``observation``. Dict values such as
+            multi-camera observations get one column per entry. Keys may be
+            missing, e.g. ``action`` on the first step.
+        """
+        for key, value in step.items():
+            if isinstance(value, dict):
+                for sub_key, sub_value in value.items():
+                    self._append(f"{key}/{sub_key}", sub_value)
+            else:
+                self._append(key, value)
+
+    def _append(self, key, value):
+        value = np.asarray(value)
+        column = self._columns.get(key)
+        if column is None:
+            shape = (self.initial_capacity,) + value.shape
+            column = self._spill_column(key, shape, value.dtype) if self.spilled else np.empty(shape, value.dtype)
+            self._lengths[key] = 0
+        elif value.shape != column.shape[1:]:
+            raise ValueError(f"Step value of '{key}' has shape {value.shape}, expected {column.shape[1:]}")
+        length = self._lengths[key]
+        if not np.can_cast(value.dtype, column.dtype, casting="same_kind"):
+            column = self._resize(key, column, length, len(column), np.result_type(column.dtype, value.dtype))
+        elif length == len(column):
+            column = self._resize(key, column, length, 2 * len(column), column.dtype)
+        column[length] = value
+        self._columns[key] = column
+        self._lengths[key] = length + 1
+        if self.memory_budget is not None and not self.spilled and self.nbytes > self.memory_budget:
+            self.spill()
+
+    def _resize(self, key, column, length, capacity, dtype):
+        if key in self._spill_files:
+            resized = self._spill_column(key, (capacity,) + column.shape[1:], dtype)
+        else:
+            resized = np.empty((capacity,) + column.shape[1:], dtype=dtype)
+        resized[:length] = column[:length]
+        return resized
+
+    def _spill_column(self, key, shape, dtype):
+        # The file is deleted once closed, the mapping stays valid as long as it is used.
+        spill_file = tempfile.TemporaryFile(prefix="episode_", dir=self.spill_dir)
+        nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        spill_file.truncate(max(nbytes, 1))
+        column = np.memmap(spill_file, dtype=dtype, mode="r+", shape=shape)
+        old_file = self._spill_files.get(key)
+        self._spill_files[key] = spill_file
+        if old_file is not None:
+            old_file.close()
+        return column
+
+    @property
+    def spilled(self):
+        """True once the columns were moved to memory-mapped files."""
+        return bool(self._spill_files)
+
+    def spill(self):
+        """
+        Move every column to a memory-mapped temporary file.
+
+        The recorded steps are copied over and later steps are written to the
+        files as well, so the memory taken by the episode stops growing.
+        Columns that first appear afterwards are created in files too.
+        """
+        for key, column in self._columns.items():
+            if key not in self._spill_files:
+                length = self._lengths[key]
+                spilled = self._spill_column(key, column.shape, column.dtype)
+                spilled[:length] = column[:length]
+                self._columns[key] = spilled
+
+    def close(self):
+        """Drop the recorded data and delete the spill files."""
+        self._columns = {}
+        self._lengths = {}
+        for spill_file in self._spill_files.values():
+            spill_file.close()
+        self._spill_files = {}
+
+    def __len__(self):
+        """The number of recorded actions."""
+        return self._lengths.get("action", 0)
+
+    def keys(self):
+        """The recorded keys, with ``/`` separating dict entries."""
+        return list(self._columns)
+
+    def column(self, key):
+        """Return a view of the recorded rows of `key`."""
+        return self._columns[key][:self._lengths[key]]
+
+    @property
+    def nbytes(self):
+        """The number of bytes taken by the recorded rows."""
+        return sum(self.column(key).nbytes for key in list(self._columns))
+
+    @property
+    def memory_nbytes(self):
+        """The number of recorded bytes held in memory."""
+        return sum(self.column(key).nbytes for key in list(self._columns) if key not in self._spill_files)
+
+    @property
+    def spilled_nbytes(self):
+        """The number of recorded bytes held in spill files."""
+        return sum(self.column(key).nbytes for key in list(self._spill_files))
+
+    @property
+    def allocated_nbytes(self):
+        """The number of bytes allocated for all columns."""
+        return sum(column.nbytes for column in self._columns.values())
+
+    def to_dict(self, instruction=""):
+        """
+        Return the episode in the layout of `HDF5DataManager.save_demonstration`.
+
+        Parameters
+        ----------
+        instruction : str
+            The language instruction of the episode.
+
+        Returns
+        -------
+        dict
+            Views of the recorded rows. Dict values are rebuilt from the
+            ``/`` separated keys.
+        """
+        data = {"state": [], "action": [], "reward": [], "done": [], "observation": []}
+        for key in self._columns:
+            if "/" in key:
+                parent, sub_key = key.split("/", 1)
+                if not isinstance(data.get(parent), dict):
+                    data[parent] = {}
+                data[parent][sub_key] = self.column(key)
+            else:
+                data[key] = self.column(key)
+        data["instruction"] = instruction
+        return data
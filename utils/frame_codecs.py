@@ -0,0 +1,225 @@
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
+from utils.compression import parse_codec, VIDEO_FOURCCS
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def encoder_pool():
+    """
+    Return the shared thread pool that encodes image frames and compresses chunks.
+
+    OpenCV and zlib release the GIL while encoding, so the pool spreads the
+    work over all cores while the GUI keeps running.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 4, thread_name_prefix="FrameEncoder")
+        return _pool
+
+
+def encode_image(frame, codec):
+    """
+    Encode one RGB or grayscale uint8 frame as an independently decodable image.
+
+    Parameters
+    ----------
+    frame : numpy.ndarray
+    codec : str
+        A ``"png[:<level>]"`` or ``"jpeg[:<quality>]"`` codec specification.
+
+    Returns
+    -------
+    numpy.ndarray
+        The encoded image as a uint8 array.
+    """
+    name, options = parse_codec(codec)
+    frame = np.asarray(frame, dtype=np.uint8)
+    if frame.ndim == 3:
+        frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+    if name == "png":
+        ext, params = ".png", [cv2.IMWRITE_PNG_COMPRESSION, int(options[0]) if options else 1]
+    else:
+        ext, params = ".jpg", [cv2.IMWRITE_JPEG_QUALITY, int(options[0]) if options else 95]
+    ok, data = cv2.imencode(ext, frame, params)
+    if not ok:
+        raise RuntimeError(f"Failed to encode frame as '{codec}'")
+    return data.reshape(-1)
+
+
+def decode_image(data, frame_shape):
+    """Decode a frame encoded by `encode_image`."""
+    color = len(frame_shape) == 3
+    frame = cv2.imdecode(np.asarray(data, dtype=np.uint8), cv2.IMREAD_COLOR if color else cv2.IMREAD_GRAYSCALE)
+    if frame is None:
+        raise IOError("Failed to decode frame")
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) if color else frame
+
+
+class ImageFrames:
+    def __init__(self, dataset):
+        """
+        Random-access view of a dataset of per-frame encoded images.
+
+        Parameters
+        ----------
+        dataset : h5py.Dataset
+            A variable-length uint8 dataset written with an image codec.
+        """
+        self.dataset = dataset
+        self.frame_shape = tuple(dataset.attrs["frame_shape"])
+
+    @property
+    def shape(self):
+        return (len(self.dataset),) + self.frame_shape
+
+    def __len__(self):
+        return len(self.dataset)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            blobs = self.dataset[index]
+            if len(blobs) == 0:
+                return np.empty((0,) + self.frame_shape, dtype=np.uint8)
+            return np.stack(list(encoder_pool().map(decode_image, blobs, [self.frame_shape] * len(blobs))))
+        return decode_image(self.dataset[index], self.frame_shape)
+
+    def close(self):
+        pass
+
+
+class VideoEncoder:
+    def __init__(self, codec, fps=20):
+        """
+        Incrementally encode one camera stream into a video file.
+
+        Frames are written to a temporary file as they arrive, so the stream
+        is never held in memory. `finish` returns the encoded file contents.
+
+        Parameters
+        ----------
+        codec : str
+            A ``"video[:<fourcc>[:<quality>]]"`` codec specification.
+        fps : int, optional
+            The frame rate written into the container, by default 20.
+        """
+        _, options = parse_codec(codec)
+        self.fourcc = options[0] if options else "ffv1"
+        self.quality = int(options[1]) if len(options) > 1 else None
+        self.suffix = VIDEO_FOURCCS[self.fourcc]
+        self.fps = fps
+        self.frame_shape = None
+        self.n_frames = 0
+        fd, self.path = tempfile.mkstemp(suffix=self.suffix)
+        os.close(fd)
+        self._writer = None
+
+    def add(self, frame):
+        """Append one RGB or grayscale uint8 frame."""
+        frame = np.asarray(frame, dtype=np.uint8)
+        if self._writer is None:
+            self.frame_shape = frame.shape
+            height, width = frame.shape[:2]
+            self._writer = cv2.VideoWriter(
+                self.path, cv2.VideoWriter_fourcc(*self.fourcc.upper()), self.fps,
+                (width, height), frame.ndim == 3
+            )
+            if not self._writer.isOpened():
+                raise RuntimeError(f"OpenCV cannot encode '{self.fourcc}' video")
+            if self.quality is not None:
+                self._writer.set(cv2.VIDEOWRITER_PROP_QUALITY, self.quality)
+        elif frame.shape != self.frame_shape:
+            raise ValueError(f"Frame shape {frame.shape} does not match {self.frame_shape}")
+        self._writer.write(cv2.cvtColor(frame, cv2.COLOR_RGB2BGR) if frame.ndim == 3 else frame)
+        self.n_frames += 1
+
+    def finish(self):
+        """
+        Finalize the video.
+
+        Returns
+        -------
+        numpy.ndarray
+            The encoded video file as a uint8 array.
+        """
+        try:
+            if self._writer is not None:
+                self._writer.release()
+            with open(self.path, "rb") as f:
+                return np.frombuffer(f.read(), dtype=np.uint8)
+        finally:
+            os.remove(self.path)
+
+    def discard(self):
+        """Drop the video without finalizing it."""
+        if self._writer is not None:
+            self._writer.release()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class VideoDecoder:
+    def __init__(self, data, frame_shape, n_frames, suffix=".mkv"):
+        """
+        Random-access reader for a video encoded by `VideoEncoder`.
+
+        Sequential reads decode the next frame, other reads seek first.
+
+        Parameters
+        ----------
+        data : numpy.ndarray
+            The encoded video file as a uint8 array.
+        frame_shape : tuple
+            The shape of a decoded frame.
+        n_frames : int
+            The number of frames exposed. Frames past it are ignored.
+        suffix : str, optional
+            The container file extension.
+        """
+        self.frame_shape = tuple(frame_shape)
+        self.n_frames = int(n_frames)
+        fd, self.path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(fd, "wb") as f:
+            f.write(np.asarray(data, dtype=np.uint8).tobytes())
+        self._capture = cv2.VideoCapture(self.path)
+        self._position = 0
+
+    @property
+    def shape(self):
+        return (self.n_frames,) + self.frame_shape
+
+    def __len__(self):
+        return self.n_frames
+
+    def _read(self, i):
+        if i != self._position:
+            self._capture.set(cv2.CAP_PROP_POS_FRAMES, i)
+        ok, frame = self._capture.read()
+        if not ok:
+            raise IOError(f"Failed to decode frame {i} of {self.path}")
+        self._position = i + 1
+        if len(self.frame_shape) == 2:
+            return frame[..., 0] if frame.ndim == 3 else frame
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            frames = [self._read(i) for i in range(*index.indices(self.n_frames))]
+            return np.stack(frames) if frames else np.empty((0,) + self.frame_shape, dtype=np.uint8)
+        if index < 0:
+            index += self.n_frames
+        if not 0 <= index < self.n_frames:
+            raise IndexError(f"Frame {index} out of range for video of length {self.n_frames}")
+        return self._read(index)
+
+    def close(self):
+        self._capture.release()
+        if os.path.exists(self.path):
+            os.remove(self.path)
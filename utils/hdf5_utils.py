@@ -1,12 +1,621 @@
+import json
+import queue
 import threading
+import weakref
 from datetime import datetime
 import h5py
 import numpy as np
 import os
+from utils.compression import (
+    codec_kwargs, resolve_codec, make_codec_policy, check_readable, is_video_codec, is_image_codec
+)
+from utils.frame_codecs import VideoEncoder, VideoDecoder, ImageFrames, encoder_pool, encode_image
+from utils.chunk_writer import write_chunked, compress_chunks, is_parallel_codec, can_write_chunked
+from utils.chunking import make_chunk_policy, resolve_layout, chunk_shape
+from utils.catalog import EpisodeCatalog, catalog_path, demo_created_time
+from utils.rwlock import RWLock
+
+
+def _new_demo_id(f, claim=None):
+    """
+    Return a timestamp based demo id that is not yet used in `f`.
+
+    `claim` is an optional callable that reserves an id across files and
+    returns False if it is already taken.
+    """
+    base = datetime.now().strftime("%Y%m%d_%H%M%S")
+    demo_id = base
+    suffix = 1
+    while demo_id in f or (claim is not None and not claim(demo_id)):
+        suffix += 1
+        demo_id = f"{base}_{suffix}"
+    return demo_id
+
+
+def _create_dataset(group, key, codec_policy, resizable=False, parallel=False, chunk_policy=None, **kwargs):
+    """
+    Create a dataset compressed with the codec the policy picks for `key`.
+
+    The codec is recorded in the ``codec`` attribute of the dataset.
+    Resizable datasets are always chunked, others only when compressed, with
+    the layout `chunk_policy` picks for `key`, see `utils.chunking`.
+    Camera frames with an image codec are encoded from ``data`` in the
+    encoder pool, with a video codec into a single blob, see `_write_video`.
+    With `parallel`, gzip-compressed ``data`` has its chunks compressed in
+    the encoder pool, see `utils.chunk_writer.write_chunked`.
+    """
+    return _prepare_dataset(key, codec_policy, resizable, parallel, chunk_policy, **kwargs)(group)
+
+
+def _prepare_dataset(key, codec_policy, resizable=False, parallel=False, chunk_policy=None, **kwargs):
+    """
+    Encode and compress a dataset of `_create_dataset` ahead of writing it,
+    e.g. before the file is locked.
+
+    Camera frames are encoded and parallel gzip chunks compressed right
+    away. Other datasets, and gzip chunks whose shape h5py guesses, are
+    compressed by HDF5 when the dataset is created.
+
+    Returns
+    -------
+    callable
+        Called with a group, creates the dataset in it and returns it.
+    """
+    codec = resolve_codec(key, codec_policy)
+    if is_image_codec(codec):
+        data = kwargs["data"]
+        blobs = list(encoder_pool().map(encode_image, data, [codec] * len(data)))
+
+        def write_images(group):
+            dataset = _create_image_dataset(group, key, codec, data.shape[1:])
+            _append_images(dataset, blobs)
+            return dataset
+        return write_images
+    if is_video_codec(codec):
+        encoder = VideoEncoder(codec)
+        try:
+            for frame in kwargs["data"]:
+                encoder.add(frame)
+        except Exception:
+            encoder.discard()
+            raise
+        video = encoder.finish()
+        return lambda group: _write_video(group, key, codec, encoder, encoder.n_frames, data=video)
+    compression = codec_kwargs(codec)
+    if (compression or resizable) and kwargs.get("chunks") is None:
+        shape = kwargs["shape"] if "shape" in kwargs else np.shape(kwargs["data"])
+        kwargs["chunks"] = chunk_shape(resolve_layout(key, chunk_policy or {}), shape, resizable)
+    if parallel and not resizable and is_parallel_codec(codec) and can_write_chunked(kwargs.get("data")):
+        data, chunks = kwargs["data"], kwargs["chunks"]
+        # A guessed chunk shape is only known once the dataset exists.
+        compressed = compress_chunks(data, codec, chunks) if isinstance(chunks, tuple) else None
+        return lambda group: write_chunked(group, key, data, codec, chunks, compressed)
+
+    def write(group):
+        dataset = group.create_dataset(key, **compression, **kwargs)
+        dataset.attrs["codec"] = codec
+        return dataset
+    return write
+
+
+def _create_image_dataset(group, key, codec, frame_shape):
+    """Create a variable-length uint8 dataset holding one encoded image per frame."""
+    dataset = group.create_dataset(
+        key, shape=(0,), maxshape=(None,), dtype=h5py.vlen_dtype(np.uint8), chunks=True
+    )
+    dataset.attrs["codec"] = codec
+    dataset.attrs["frame_shape"] = tuple(frame_shape)
+    return dataset
+
+
+def _append_images(dataset, blobs):
+    """
+    Append encoded images to a dataset created by `_create_image_dataset`.
+
+    The images live in the global heap, which the storage size of the
+    dataset leaves out, so their total size is kept in its ``blob_nbytes``
+    attribute, see `_blob_nbytes`.
+    """
+    nbytes = _blob_nbytes(dataset) + sum(len(blob) for blob in blobs)
+    start = dataset.shape[0]
+    dataset.resize(start + len(blobs), axis=0)
+    # Written one by one: h5py treats equally sized blobs as a 2D array.
+    for i, blob in enumerate(blobs):
+        dataset[start + i] = blob
+    dataset.attrs["blob_nbytes"] = nbytes
+
+
+def _is_blob_dataset(dataset):
+    """True for variable-length uint8 datasets, i.e. encoded images."""
+    return h5py.check_vlen_dtype(dataset.dtype) == np.uint8
+
+
+def _blob_nbytes(dataset):
+    """
+    Return the size of the encoded images of a `_create_image_dataset`
+    dataset, read from the images themselves in files written before their
+    size was recorded.
+    """
+    if "blob_nbytes" in dataset.attrs:
+        return int(dataset.attrs["blob_nbytes"])
+    return sum(len(blob) for blob in dataset[()])
+
+
+def _write_video(group, key, codec, encoder, length, data=None):
+    """
+    Store the video of `encoder` as a uint8 blob dataset.
+
+    The frame shape, number of frames and container format are recorded in
+    the dataset attributes for `_open_frames`. `data` is the video returned
+    by ``encoder.finish()`` if the encoder was finished ahead.
+    """
+    if data is None:
+        data = encoder.finish()
+    dataset = group.create_dataset(key, data=data)
+    dataset.attrs["codec"] = codec
+    dataset.attrs["frame_shape"] = encoder.frame_shape
+    dataset.attrs["length"] = min(length, encoder.n_frames)
+    dataset.attrs["container"] = encoder.suffix
+    return dataset
+
+
+def _open_frames(dataset):
+    """
+    Return an indexable view of a dataset.
+
+    Frame-coded datasets are wrapped in an `ImageFrames` or `VideoDecoder`,
+    which must be closed by the caller. Other datasets are returned as they are.
+    """
+    check_readable(dataset)
+    codec = dataset.attrs.get("codec", "none")
+    if isinstance(codec, bytes):
+        codec = codec.decode()
+    if is_image_codec(codec):
+        return ImageFrames(dataset)
+    if is_video_codec(codec):
+        return VideoDecoder(dataset[:], dataset.attrs["frame_shape"], dataset.attrs["length"],
+                            dataset.attrs["container"])
+    return dataset
+
+
+def _read_all(dataset):
+    """Read a whole dataset, decoding frame-coded ones."""
+    frames = _open_frames(dataset)
+    if frames is dataset:
+        return dataset[:]
+    try:
+        return frames[:]
+    finally:
+        frames.close()
+
+
+def _describe_demo(group):
+    """
+    Summarize a finalized demo group for the episode catalog.
+
+    Returns None for groups that are still being written.
+    """
+    if 'instruction' not in group:
+        return None
+    instruction = group['instruction'][()]
+    done = group['done'] if 'done' in group else None
+    nbytes = 0
+
+    def add_size(name, item):
+        nonlocal nbytes
+        if isinstance(item, h5py.Dataset):
+            nbytes += item.id.get_storage_size()
+            if _is_blob_dataset(item):
+                nbytes += _blob_nbytes(item)
+
+    group.visititems(add_size)
+    demo_id = group.name.split("/")[-1]
+    return {
+        "demo_id": demo_id,
+        "length": group['action'].shape[0] if 'action' in group else 0,
+        "instruction": instruction.decode() if isinstance(instruction, bytes) else str(instruction),
+        "success": bool(done[-1]) if done is not None and done.shape[0] > 0 else False,
+        "nbytes": nbytes,
+        "created": demo_created_time(demo_id),
+    }
+
+
+def _flatten_step(step):
+    """Flatten nested dict values into ``"key/sub_key"`` entries."""
+    flat = {}
+    for key, value in step.items():
+        if isinstance(value, dict):
+            for sub_key, sub_value in value.items():
+                flat[f"{key}/{sub_key}"] = sub_value
+        else:
+            flat[key] = value
+    return flat
+
+
+class EpisodeWriter:
+    _STOP = object()
+
+    def __init__(self, file_path, lock, codec_policy=None, on_close=None, claim_id=None,
+                 batch_size=16, max_pending=256, chunk_policy=None, on_abort=None):
+        """
+        Stream a single episode into an HDF5 group while it is being recorded.
+
+        Steps passed to `append` are queued and written by a background thread
+        into resizable, chunked datasets, so the episode never has to be held
+        in memory as a whole.
+
+        Parameters
+        ----------
+        file_path : str
+            The HDF5 file the episode group lives in.
+        lock : RWLock
+            The reader/writer lock guarding the HDF5 file.
+        codec_policy : dict, optional
+            Mapping of dataset key patterns to compression codecs, see
+            `utils.compression.make_codec_policy`.
+        on_close : callable, optional
+            Called with the finalized episode group before the file is closed.
+        claim_id : callable, optional
+            Reserves the new demo id across files, see `_new_demo_id`.
+        batch_size : int
+            The maximum number of queued steps written in one go.
+        max_pending : int
+            The maximum number of steps waiting to be written. `append` blocks
+            when the writer falls this far behind.
+        chunk_policy : dict, optional
+            Mapping of dataset key patterns to chunk layouts, see
+            `utils.chunking.make_chunk_policy`.
+        on_abort : callable, optional
+            Called with the demo id once the episode was removed instead of
+            saved, e.g. to drop the reservation made by `claim_id`.
+        """
+        self.file_path = file_path
+        self.batch_size = batch_size
+        self.codec_policy = make_codec_policy(codec_policy)
+        self.chunk_policy = make_chunk_policy(chunk_policy)
+        self.on_close = on_close
+        self.on_abort = on_abort
+        self.n_actions = 0
+        self._lock = lock
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._error = None
+        self._closed = False
+        self._encoders = {}
+        self._frame_shapes = {}
+
+        with self._lock.write():
+            self._file = h5py.File(file_path, 'a')
+            self.demo_id = _new_demo_id(self._file, claim_id)
+            self._group = self._file.create_group(self.demo_id)
+
+        self._thread = threading.Thread(target=self._run, name=f"EpisodeWriter-{self.demo_id}", daemon=True)
+        self._thread.start()
+
+    @property
+    def is_open(self):
+        """True until the episode file has been closed by `close` or `abort`."""
+        return self._file.id.valid
+
+    @property
+    def pending_steps(self):
+        """The number of appended steps not yet written."""
+        return self._queue.qsize()
+
+    def append(self, step):
+        """
+        Queue one step for writing.
+
+        Parameters
+        ----------
+        step : dict
+            Mapping of dataset key to the value recorded at this step. Dict
+            values (e.g. multi-camera observations) are stored as sub-datasets.
+            Keys may be omitted, e.g. the initial step carries no action.
+        """
+        if self._closed:
+            raise RuntimeError(f"Episode '{self.demo_id}' is already closed")
+        if self._error is not None:
+            raise self._error
+        step = _flatten_step(step)
+        if "action" in step:
+            self.n_actions += 1
+        # Start encoding image-coded frames right away, overlapping with recording.
+        for key, value in step.items():
+            codec = resolve_codec(key, self.codec_policy)
+            if is_image_codec(codec):
+                self._frame_shapes.setdefault(key, np.shape(value))
+                step[key] = encoder_pool().submit(encode_image, np.asarray(value), codec)
+        self._queue.put(step)
+
+    def close(self, instruction=""):
+        """
+        Flush the remaining steps and finalize the episode.
+
+        All datasets are truncated to the number of recorded actions, matching
+        the layout written by `HDF5DataManager.save_demonstration`. An episode
+        without actions is removed instead.
+
+        Parameters
+        ----------
+        instruction : str
+            The language instruction of the episode.
+
+        Returns
+        -------
+        str
+            The id of the saved episode.
+
+        Raises
+        ------
+        ValueError
+            If no action was recorded.
+        """
+        self._finish()
+        if self.n_actions == 0:
+            self._remove()
+            raise ValueError(f"Episode '{self.demo_id}' has no recorded actions")
+        try:
+            with self._lock.write():
+                n_steps = self._group["action"].shape[0] if "action" in self._group else 0
+                self._truncate(self._group, n_steps)
+                for key, encoder in self._encoders.items():
+                    _write_video(self._group, key, resolve_codec(key, self.codec_policy), encoder, n_steps)
+                dt = h5py.string_dtype(encoding='utf-8')
+                self._group.create_dataset('instruction', data=instruction, dtype=dt)
+                self._file.flush()
+                if self.on_close is not None:
+                    self.on_close(self._group)
+        finally:
+            self._discard_encoders()
+            self._close_file()
+        return self.demo_id
+
+    def abort(self):
+        """Stop writing and remove the partially written episode."""
+        self._finish(raise_error=False)
+        self._remove()
+
+    def _remove(self):
+        self._discard_encoders()
+        try:
+            with self._lock.write():
+                if self.demo_id in self._file:
+                    del self._file[self.demo_id]
+        finally:
+            self._close_file()
+        if self.on_abort is not None:
+            self.on_abort(self.demo_id)
+
+    def _finish(self, raise_error=True):
+        if self._closed:
+            raise RuntimeError(f"Episode '{self.demo_id}' is already closed")
+        self._closed = True
+        self._queue.put(self._STOP)
+        self._thread.join()
+        if raise_error and self._error is not None:
+            self._close_file()
+            raise self._error
+
+    def _discard_encoders(self):
+        for encoder in self._encoders.values():
+            encoder.discard()
+        self._encoders = {}
+        self._frame_shapes = {}
+
+    def _close_file(self):
+        with self._lock.write():
+            if self._file.id.valid:
+                self._file.close()
+
+    def _truncate(self, group, length):
+        for item in group.values():
+            if isinstance(item, h5py.Group):
+                self._truncate(item, length)
+            elif item.shape[0] > length:
+                if _is_blob_dataset(item):
+                    item.attrs["blob_nbytes"] = _blob_nbytes(item) - sum(len(blob) for blob in item[length:])
+                item.resize(length, axis=0)
+
+    def _run(self):
+        stop = False
+        while not stop:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if batch[-1] is self._STOP:
+                batch.pop()
+                stop = True
+            if batch and self._error is None:
+                try:
+                    self._write_batch(batch)
+                except Exception as e:
+                    self._error = e
+
+    def _write_batch(self, batch):
+        columns = {}
+        for step in batch:
+            for key, value in step.items():
+                columns.setdefault(key, []).append(value)
+
+        # Video-coded camera streams go to their encoder and are stored on close.
+        for key in list(columns):
+            codec = resolve_codec(key, self.codec_policy)
+            if is_video_codec(codec):
+                if key not in self._encoders:
+                    self._encoders[key] = VideoEncoder(codec)
+                for frame in columns.pop(key):
+                    self._encoders[key].add(frame)
+
+        images = {}
+        for key in list(columns):
+            if is_image_codec(resolve_codec(key, self.codec_policy)):
+                images[key] = [future.result() for future in columns.pop(key)]
+
+        with self._lock.write():
+            for key, blobs in images.items():
+                if key not in self._group:
+                    frame_shape = self._frame_shapes[key]
+                    _create_image_dataset(self._group, key, resolve_codec(key, self.codec_policy), frame_shape)
+                _append_images(self._group[key], blobs)
+            for key, values in columns.items():
+                data = np.stack([np.asarray(v) for v in values])
+                if key not in self._group:
+                    _create_dataset(
+                        self._group,
+                        key,
+                        self.codec_policy,
+                        resizable=True,
+                        chunk_policy=self.chunk_policy,
+                        shape=(0,) + data.shape[1:],
+                        maxshape=(None,) + data.shape[1:],
+                        dtype=data.dtype
+                    )
+                dataset = self._group[key]
+                start = dataset.shape[0]
+                dataset.resize(start + data.shape[0], axis=0)
+                dataset[start:] = data
+            self._file.flush()
+
+
+class DemoHandle:
+    def __init__(self, file_path, demo_id, lock, register=None):
+        """
+        Lazy, frame-addressable view of a saved demonstration.
+
+        The HDF5 file is kept open and only the requested slices are read, so
+        a long multi-camera episode can be shown from its first frame without
+        loading it as a whole.
+
+        Parameters
+        ----------
+        file_path : str
+            The HDF5 file the demonstration lives in.
+        demo_id : str
+            The name of the demonstration group.
+        lock : RWLock
+            The reader/writer lock guarding the HDF5 file.
+        register : callable, optional
+            Called with the handle before it first opens the file, so a
+            writer can release it, see `HDF5DataManager._release_readers`.
+        """
+        self.file_path = file_path
+        self.demo_id = demo_id
+        self._lock = lock
+        self._file = None
+        self._decoders = {}
+        if register is not None:
+            register(self)
+        with self._lock.read():
+            self._length = self._group()["action"].shape[0]
+
+    def _group(self):
+        """Return the demo group, reopening the file if it was released."""
+        if self._file is None or not self._file.id.valid:
+            self._file = h5py.File(self.file_path, 'r')
+        return self._file[self.demo_id]
+
+    def _read(self, key, index):
+        item = self._group()[key]
+        if isinstance(item, h5py.Group):
+            return {sub_key: self._read(f"{key}/{sub_key}", index) for sub_key in item.keys()}
+        if key not in self._decoders:
+            self._decoders[key] = _open_frames(item)
+        frames = self._decoders[key]
+        return frames[index]
+
+    def release(self):
+        """Close the underlying file. It is reopened on the next access."""
+        with self._lock.write():
+            for frames in self._decoders.values():
+                if not isinstance(frames, h5py.Dataset):
+                    frames.close()
+            self._decoders = {}
+            if self._file is not None and self._file.id.valid:
+                self._file.close()
+            self._file = None
+
+    close = release
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self._length
+
+    def keys(self):
+        """Return the top-level dataset keys, excluding the instruction."""
+        with self._lock.read():
+            return [key for key in self._group().keys() if key != 'instruction']
+
+    @property
+    def instruction(self):
+        with self._lock.read():
+            group = self._group()
+            if 'instruction' not in group:
+                return ""
+            value = group['instruction'][()]
+        return value.decode() if isinstance(value, bytes) else value
+
+    def frame(self, i):
+        """
+        Read a single step.
+
+        Parameters
+        ----------
+        i : int
+            The index of the step, negative indices count from the end.
+
+        Returns
+        -------
+        dict
+            The value of every dataset at step `i`. Grouped datasets such as
+            multi-camera observations are returned as dicts.
+        """
+        if i < 0:
+            i += self._length
+        if not 0 <= i < self._length:
+            raise IndexError(f"Frame {i} out of range for demonstration of length {self._length}")
+        with self._lock.read():
+            return {key: self._read(key, i) for key in self.keys()}
+
+    def slice(self, start, stop):
+        """
+        Read a contiguous range of steps.
+
+        Parameters
+        ----------
+        start : int
+        stop : int
+
+        Returns
+        -------
+        dict
+            Columnar arrays of every dataset for steps ``start`` to ``stop``.
+        """
+        start, stop, _ = slice(start, stop).indices(self._length)
+        with self._lock.read():
+            return {key: self._read(key, slice(start, stop)) for key in self.keys()}
+
+    @property
+    def actions(self):
+        with self._lock.read():
+            return self._read("action", slice(None))
+
+    @property
+    def states(self):
+        with self._lock.read():
+            return self._read("state", slice(None))
 
 
 class HDF5DataManager:
-    def __init__(self, root_dir):        
+    def __init__(self, root_dir, codecs=None, shard_max_episodes=None, shard_max_mb=None,
+                 auto_compact_ratio=None, parallel_compression=True, chunk_layouts=None):
         """
         Constructor for HDF5DataManager.
 
@@ -14,16 +623,247 @@ class HDF5DataManager:
         ----------
         root_dir : str
             The directory where HDF5 files will be stored.
+        codecs : dict, optional
+            Mapping of dataset key patterns (e.g. ``"observation/*"``,
+            ``"action"``) to compression codecs such as ``"none"``, ``"lzf"``,
+            ``"gzip:4"`` or ``"blosc:lz4"``. Overrides the defaults in
+            `utils.compression.DEFAULT_CODEC_POLICY`.
+        shard_max_episodes : int, optional
+            Store each env/task in rolling shard files under
+            ``{env}_{task}/shard_XXXXX.hdf5`` holding at most this many
+            episodes. Use 1 for one file per episode.
+        shard_max_mb : float, optional
+            Store each env/task in rolling shard files of roughly this size.
+            A new shard is started once the current one reaches it.
+        auto_compact_ratio : float, optional
+            Compact a file in the background after a delete leaves at least
+            this fraction of it unused, e.g. 0.3.
+        parallel_compression : bool, optional
+            Compress the chunks of gzip-coded datasets in a thread pool when
+            saving a demonstration, by default True.
+        chunk_layouts : dict, optional
+            Mapping of dataset key patterns to chunk layouts such as
+            ``"frame"`` (one time step per chunk), ``"time:256"`` (blocks of
+            256 time steps) or ``"auto"``. Overrides the defaults in
+            `utils.chunking.DEFAULT_CHUNK_POLICY`.
         """
         self.root_dir = root_dir
+        self.codec_policy = make_codec_policy(codecs)
+        self.shard_max_episodes = shard_max_episodes
+        self.shard_max_mb = shard_max_mb
+        self.auto_compact_ratio = auto_compact_ratio
+        self.parallel_compression = parallel_compression
+        self.chunk_policy = make_chunk_policy(chunk_layouts)
         os.makedirs(root_dir, exist_ok=True)
-        self._lock = threading.Lock()
+        self._guard = threading.Lock()
+        self._file_locks = {}
+        self._claimed_ids = set()
+        self._handles = weakref.WeakSet()
+        self._writers = weakref.WeakSet()
+        self._compacting = set()
+        self.catalog = EpisodeCatalog(catalog_path(root_dir))
+
+    @property
+    def sharded(self):
+        """True if new demonstrations are written to rolling shard files."""
+        return self.shard_max_episodes is not None or self.shard_max_mb is not None
 
     def _get_file_path(self, env_name, task_name):
         """Return HDF5 file path for given env/task"""
         filename = f"{env_name}_{task_name}.hdf5"
         return os.path.join(self.root_dir, filename)
 
+    def _get_shard_dir(self, env_name, task_name):
+        """Return the directory holding the shard files of an env/task"""
+        return os.path.join(self.root_dir, f"{env_name}_{task_name}")
+
+    def _get_task_files(self, env_name, task_name):
+        """Return every HDF5 file holding demonstrations of an env/task"""
+        files = []
+        file_path = self._get_file_path(env_name, task_name)
+        if os.path.exists(file_path):
+            files.append(file_path)
+        shard_dir = self._get_shard_dir(env_name, task_name)
+        if os.path.isdir(shard_dir):
+            files += [os.path.join(shard_dir, name) for name in sorted(os.listdir(shard_dir))
+                      if name.startswith("shard_") and name.endswith(".hdf5")]
+        return files
+
+    def _get_demo_path(self, env_name, task_name, demo_id):
+        """Return the HDF5 file holding a demonstration"""
+        self._ensure_indexed(env_name, task_name)
+        entry = self.catalog.get(env_name, task_name, demo_id)
+        if entry is not None and entry["file"]:
+            return os.path.join(self.root_dir, entry["file"])
+        return self._get_file_path(env_name, task_name)
+
+    def _get_write_path(self, env_name, task_name):
+        """
+        Return the file a new demonstration goes to.
+
+        In the sharded layout this is the last shard, or a new one once the
+        last shard holds `shard_max_episodes` episodes (including ones still
+        being recorded) or `shard_max_mb` megabytes. Must be called with the
+        write lock of the shard directory held.
+        """
+        if not self.sharded:
+            return self._get_file_path(env_name, task_name)
+        shard_dir = self._get_shard_dir(env_name, task_name)
+        os.makedirs(shard_dir, exist_ok=True)
+        shards = sorted(name for name in os.listdir(shard_dir) if name.startswith("shard_") and name.endswith(".hdf5"))
+        index = 0
+        if shards:
+            index = int(shards[-1][len("shard_"):-len(".hdf5")])
+            file_path = os.path.join(shard_dir, shards[-1])
+            with self._file_lock(file_path).read():
+                with h5py.File(file_path, 'r') as f:
+                    n_episodes = len(f.keys())
+            full = (self.shard_max_episodes is not None and n_episodes >= self.shard_max_episodes) or \
+                   (self.shard_max_mb is not None and os.path.getsize(file_path) >= self.shard_max_mb * 2 ** 20)
+            if not full:
+                return file_path
+            index += 1
+        return os.path.join(shard_dir, f"shard_{index:05d}.hdf5")
+
+    def _claim_demo_id(self, env_name, task_name, demo_id):
+        """Reserve a demo id across all files of an env/task, False if it is taken."""
+        key = (env_name, task_name, demo_id)
+        with self._guard:
+            if key in self._claimed_ids:
+                return False
+            if self.catalog.get(env_name, task_name, demo_id) is not None:
+                return False
+            self._claimed_ids.add(key)
+            return True
+
+    def _release_demo_id(self, env_name, task_name, demo_id):
+        """Drop the reservation of a demo id that was not saved."""
+        with self._guard:
+            self._claimed_ids.discard((env_name, task_name, demo_id))
+
+    def _write_manifest(self, env_name, task_name):
+        """
+        Write ``manifest.json`` listing the episodes of every shard of an env/task.
+
+        The manifest is replaced atomically, so shards can be synced and read
+        by other machines without opening the catalog.
+        """
+        shard_dir = self._get_shard_dir(env_name, task_name)
+        if not os.path.isdir(shard_dir):
+            return
+        shards = {}
+        for entry in self.catalog.entries(env_name, task_name):
+            if os.path.dirname(entry["file"]) != os.path.basename(shard_dir):
+                continue
+            shard = shards.setdefault(os.path.basename(entry["file"]), {"episodes": [], "nbytes": 0})
+            shard["episodes"].append({key: entry[key] for key in ("demo_id", "length", "instruction", "success", "nbytes", "created")})
+            shard["nbytes"] += entry["nbytes"]
+        manifest = {
+            "env_name": env_name,
+            "task_name": task_name,
+            "shards": [dict(file=name, **shard) for name, shard in sorted(shards.items())],
+        }
+        tmp_path = os.path.join(shard_dir, "manifest.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, os.path.join(shard_dir, "manifest.json"))
+
+    def _file_lock(self, file_path):
+        """
+        Return the reader/writer lock of an HDF5 file.
+
+        Each file has its own lock, so reading one task is never blocked by a
+        save into another.
+        """
+        with self._guard:
+            lock = self._file_locks.get(file_path)
+            if lock is None:
+                lock = self._file_locks[file_path] = RWLock()
+            return lock
+
+    def _release_readers(self, file_path):
+        """
+        Close the files of open demo handles on `file_path`.
+
+        HDF5 cannot open a file for writing while it is open read-only in the
+        same process, so handles give up their file before a write and reopen
+        it lazily afterwards. Must be called with the write lock of the file held.
+        """
+        with self._guard:
+            handles = list(self._handles)
+        for handle in handles:
+            if handle.file_path == file_path:
+                handle.release()
+
+    def open_episode(self, env_name: str, task_name: str, **kwargs):
+        """
+        Start streaming a new demonstration into the HDF5 file.
+
+        Parameters
+        ----------
+        env_name : str
+        task_name : str
+        **kwargs
+            Extra arguments forwarded to `EpisodeWriter`.
+
+        Returns
+        -------
+        EpisodeWriter
+            The writer that receives the steps of the episode.
+        """
+        self._ensure_indexed(env_name, task_name)
+        kwargs.setdefault("codec_policy", self.codec_policy)
+        kwargs.setdefault("chunk_policy", self.chunk_policy)
+        kwargs.setdefault("claim_id", lambda demo_id: self._claim_demo_id(env_name, task_name, demo_id))
+        kwargs.setdefault("on_abort", lambda demo_id: self._release_demo_id(env_name, task_name, demo_id))
+        with self._file_lock(self._get_shard_dir(env_name, task_name)).write():
+            file_path = self._get_write_path(env_name, task_name)
+            kwargs.setdefault("on_close", lambda group: self._catalog_add(env_name, task_name, file_path, group))
+            lock = self._file_lock(file_path)
+            with lock.write():
+                self._release_readers(file_path)
+                writer = EpisodeWriter(file_path, lock, **kwargs)
+        with self._guard:
+            self._writers.add(writer)
+        return writer
+
+    def _catalog_add(self, env_name, task_name, file_path, group):
+        """Record a finalized demo group in the catalog. Must be called with the file lock held."""
+        entry = _describe_demo(group)
+        if entry is not None:
+            entry["file"] = os.path.relpath(file_path, self.root_dir)
+            self.catalog.add(env_name, task_name, **entry)
+            self._write_manifest(env_name, task_name)
+        self._release_demo_id(env_name, task_name, group.name.split("/")[-1])
+
+    def _ensure_indexed(self, env_name, task_name):
+        """Index an env/task file the catalog has not seen yet, e.g. one written by an older version."""
+        if not self.catalog.is_indexed(env_name, task_name):
+            self.reindex_demonstrations(env_name, task_name)
+
+    def reindex_demonstrations(self, env_name, task_name):
+        """
+        Rebuild the catalog entries of an env/task from its HDF5 files.
+
+        Only needed if the files were modified outside of this data manager.
+
+        Parameters
+        ----------
+        env_name : str
+        task_name : str
+        """
+        entries = []
+        for file_path in self._get_task_files(env_name, task_name):
+            with self._file_lock(file_path).read():
+                with h5py.File(file_path, 'r') as f:
+                    for demo_id in f.keys():
+                        entry = _describe_demo(f[demo_id])
+                        if entry is not None:
+                            entry["file"] = os.path.relpath(file_path, self.root_dir)
+                            entries.append(entry)
+        self.catalog.replace_all(env_name, task_name, entries)
+        self._write_manifest(env_name, task_name)
+
     def save_demonstration(self, env_name: str, task_name: str, demo_data):
         """
         Save a demonstration into the HDF5 file.
@@ -33,42 +873,87 @@ class HDF5DataManager:
         env_name : str
         task_name : str
         demo_data : dict
+            Lists of per-step values, or the arrays returned by
+            `utils.episode_buffer.EpisodeBuffer.to_dict`.
+
+        Returns
+        -------
+        str
+            The id of the saved demonstration.
         """
         min_l = len(demo_data["action"])
-        with self._lock:
-            file_path = self._get_file_path(env_name, task_name)
-            with h5py.File(file_path, 'a') as f:
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                demo_group = f.require_group(timestamp)
-                
-                for key, value in demo_data.items():
-                    if key == 'instruction':
-                        dt = h5py.string_dtype(encoding='utf-8')
-                        demo_group.create_dataset(key, data=value, dtype=dt)
-
-                    elif isinstance(value, list) and len(value) > 0 and isinstance(value[0], dict):
-                        for sub_key in value[0].keys():
-                            stacked = np.stack([v[sub_key] for v in value[:min_l]])
-                            demo_group.create_dataset(
-                                f"{key}/{sub_key}", 
-                                data=stacked, 
-                                compression="gzip", 
-                                chunks=True
-                            )
-                    else:
-                        demo_group.create_dataset(
-                            key, 
-                            data=np.array(value[:min_l]), 
-                            compression="gzip", 
-                            chunks=True
-                        )
+        # Stacked, encoded and compressed before the files are locked, which only guard the writes.
+        datasets = []
+        for key, value in demo_data.items():
+            if key == 'instruction':
+                dt = h5py.string_dtype(encoding='utf-8')
+                datasets.append(lambda group, key=key, value=value: group.create_dataset(key, data=value, dtype=dt))
+
+            elif isinstance(value, list) and len(value) > 0 and isinstance(value[0], dict):
+                for sub_key in value[0].keys():
+                    stacked = np.stack([v[sub_key] for v in value[:min_l]])
+                    datasets.append(_prepare_dataset(f"{key}/{sub_key}", self.codec_policy,
+                                                     parallel=self.parallel_compression,
+                                                     chunk_policy=self.chunk_policy, data=stacked))
+            elif isinstance(value, dict):
+                # Columns of an `EpisodeBuffer`, written from views without a copy.
+                for sub_key, sub_value in value.items():
+                    datasets.append(_prepare_dataset(f"{key}/{sub_key}", self.codec_policy,
+                                                     parallel=self.parallel_compression,
+                                                     chunk_policy=self.chunk_policy,
+                                                     data=np.asarray(sub_value)[:min_l]))
+            else:
+                datasets.append(_prepare_dataset(key, self.codec_policy,
+                                                 parallel=self.parallel_compression,
+                                                 chunk_policy=self.chunk_policy, data=np.asarray(value[:min_l])))
+        self._ensure_indexed(env_name, task_name)
+        with self._file_lock(self._get_shard_dir(env_name, task_name)).write():
+            file_path = self._get_write_path(env_name, task_name)
+            with self._file_lock(file_path).write():
+                self._release_readers(file_path)
+                with h5py.File(file_path, 'a') as f:
+                    demo_id = _new_demo_id(f, lambda demo_id: self._claim_demo_id(env_name, task_name, demo_id))
+                    demo_group = f.create_group(demo_id)
+                    try:
+                        for write in datasets:
+                            write(demo_group)
+                    except Exception:
+                        # Leave no group behind that the catalog, the GUI and compaction cannot see.
+                        del f[demo_id]
+                        self._release_demo_id(env_name, task_name, demo_id)
+                        raise
+                    self._catalog_add(env_name, task_name, file_path, demo_group)
+                return demo_id
+
+    def open_demonstration(self, env_name, task_name, demo_id):
+        """
+        Open a demonstration lazily.
+
+        Parameters
+        ----------
+        env_name : str
+        task_name : str
+        demo_id : str
+
+        Returns
+        -------
+        DemoHandle
+            A handle that reads frames on demand from the kept-open file.
+        """
+        file_path = self._get_demo_path(env_name, task_name, demo_id)
+        return DemoHandle(file_path, demo_id, self._file_lock(file_path), register=self._register_handle)
+
+    def _register_handle(self, handle):
+        """Track an open demo handle, so writers can release its file."""
+        with self._guard:
+            self._handles.add(handle)
 
     def load_demonstrations(self, env_name, task_name, timestamp):
         """
         Load a demonstration from the HDF5 file.
         """
-        file_path = self._get_file_path(env_name, task_name)
-        with self._lock:
+        file_path = self._get_demo_path(env_name, task_name, timestamp)
+        with self._file_lock(file_path).read():
             demonstrations = {}
             with h5py.File(file_path, 'r') as f:
                 demo_group = f[timestamp]
@@ -78,7 +963,7 @@ class HDF5DataManager:
                         demonstrations[key] = demo_group[key][()]
                     elif isinstance(demo_group[key], h5py.Group):
                         sub_keys = list(demo_group[key].keys())
-                        stacked_sub = [demo_group[key][sub_key][:] for sub_key in sub_keys]
+                        stacked_sub = [_read_all(demo_group[key][sub_key]) for sub_key in sub_keys]
 
                         demonstrations[key] = [
                             {sub_key: stacked_sub[i][j] if stacked_sub[i].ndim > 1 else stacked_sub[i][j] 
@@ -86,39 +971,186 @@ class HDF5DataManager:
                             for j in range(stacked_sub[0].shape[0])
                         ]
                     else:
-                        demonstrations[key] = demo_group[key][:]
+                        demonstrations[key] = _read_all(demo_group[key])
             
             return demonstrations
 
     def delete_demonstration(self, env_name, task_name, demo_id):
-        file_path = self._get_file_path(env_name, task_name)
-        with self._lock:
+        file_path = self._get_demo_path(env_name, task_name, demo_id)
+        with self._file_lock(file_path).write():
+            self._release_readers(file_path)
             with h5py.File(file_path, 'a') as f:
                 del f[demo_id]
+                empty_shard = len(f.keys()) == 0 and file_path != self._get_file_path(env_name, task_name)
+            if empty_shard:
+                os.remove(file_path)
+            self.catalog.remove(env_name, task_name, demo_id)
+            self._write_manifest(env_name, task_name)
+        if self.auto_compact_ratio is not None and not empty_shard:
+            stats = self._get_file_stats(env_name, task_name, file_path)
+            if stats["free_ratio"] >= self.auto_compact_ratio:
+                self.compact_demonstrations(env_name, task_name, files=[file_path])
+
+    def _get_file_stats(self, env_name, task_name, file_path, catalog_stats=None):
+        if catalog_stats is None:
+            catalog_stats = self.catalog.file_stats(env_name, task_name)
+        rel_path = os.path.relpath(file_path, self.root_dir)
+        entry = catalog_stats.get(rel_path, {"episodes": 0, "live_bytes": 0, "deleted": 0})
+        size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
+        free_bytes = max(size - entry["live_bytes"], 0)
+        return {
+            "file": rel_path,
+            "size": size,
+            "live_bytes": entry["live_bytes"],
+            "free_bytes": free_bytes,
+            "free_ratio": free_bytes / size if size else 0.0,
+            "episodes": entry["episodes"],
+            "deleted_since_compaction": entry["deleted"],
+        }
+
+    def get_storage_stats(self, env_name, task_name):
+        """
+        Report how much of the files of an env/task is unused.
+
+        HDF5 does not give the space of deleted demonstrations back, so
+        `free_bytes` (file size minus the bytes stored by live episodes,
+        including metadata overhead) shows what compaction can reclaim and
+        `deleted_since_compaction` how fragmented the file is.
+
+        Parameters
+        ----------
+        env_name : str
+        task_name : str
+
+        Returns
+        -------
+        list of dict
+            One entry per file with its ``file`` path relative to the data
+            directory, ``size``, ``live_bytes``, ``free_bytes``,
+            ``free_ratio``, ``episodes`` and ``deleted_since_compaction``.
+        """
+        self._ensure_indexed(env_name, task_name)
+        catalog_stats = self.catalog.file_stats(env_name, task_name)
+        return [self._get_file_stats(env_name, task_name, file_path, catalog_stats)
+                for file_path in self._get_task_files(env_name, task_name)]
+
+    def _has_open_writer(self, file_path):
+        with self._guard:
+            return any(writer.is_open and writer.file_path == file_path for writer in self._writers)
+
+    def compact_file(self, env_name, task_name, file_path):
+        """
+        Rewrite an HDF5 file without the space left by deleted demonstrations.
+
+        The demonstrations are copied into a fresh file one at a time, with
+        the file only locked for reading while one is copied, so readers and
+        writers keep going. The fresh file is then swapped in atomically
+        under the write lock. Compaction is skipped if an episode is being
+        recorded into the file or the file changed during the copy.
+
+        Parameters
+        ----------
+        env_name : str
+        task_name : str
+        file_path : str
+
+        Returns
+        -------
+        int or None
+            The number of bytes reclaimed, None if the file was not compacted.
+        """
+        lock = self._file_lock(file_path)
+        tmp_path = file_path + ".compact"
+        with lock.read():
+            if not os.path.exists(file_path) or self._has_open_writer(file_path):
+                return None
+            before = os.stat(file_path)
+            with h5py.File(file_path, 'r') as src:
+                attrs = dict(src.attrs)
+                names = list(src.keys())
+
+        def changed():
+            after = os.stat(file_path)
+            return self._has_open_writer(file_path) or \
+                (after.st_mtime_ns, after.st_size) != (before.st_mtime_ns, before.st_size)
+
+        with h5py.File(tmp_path, 'w') as dst:
+            dst.attrs.update(attrs)
+            for name in names:
+                # The source is reopened per demonstration, a writer cannot open a file that is open for reading.
+                with lock.read():
+                    if changed():
+                        break
+                    with h5py.File(file_path, 'r') as src:
+                        src.copy(src[name], dst, name=name)
+        with lock.write():
+            if changed():
+                os.remove(tmp_path)
+                return None
+            self._release_readers(file_path)
+            os.replace(tmp_path, file_path)
+            self.catalog.reset_deleted(env_name, task_name, os.path.relpath(file_path, self.root_dir))
+        return before.st_size - os.path.getsize(file_path)
+
+    def compact_demonstrations(self, env_name, task_name, files=None, min_free_ratio=0.0, background=True):
+        """
+        Compact the files of an env/task to reclaim the space of deleted demonstrations.
+
+        Parameters
+        ----------
+        env_name : str
+        task_name : str
+        files : list of str, optional
+            The files to compact, by default every file of the env/task.
+        min_free_ratio : float, optional
+            Only compact files with at least this fraction of unused space.
+        background : bool, optional
+            If True, compact in a daemon thread and return it immediately.
+
+        Returns
+        -------
+        threading.Thread or int
+            The compaction thread, or the total number of bytes reclaimed.
+        """
+        if files is None:
+            files = [os.path.join(self.root_dir, stats["file"])
+                     for stats in self.get_storage_stats(env_name, task_name)
+                     if stats["free_ratio"] >= min_free_ratio]
+
+        def run():
+            reclaimed = 0
+            for file_path in files:
+                with self._guard:
+                    if file_path in self._compacting:
+                        continue
+                    self._compacting.add(file_path)
+                try:
+                    reclaimed += self.compact_file(env_name, task_name, file_path) or 0
+                finally:
+                    with self._guard:
+                        self._compacting.discard(file_path)
+            return reclaimed
+
+        if not background:
+            return run()
+        thread = threading.Thread(target=run, name=f"Compact-{env_name}_{task_name}", daemon=True)
+        thread.start()
+        return thread
+
+    def count_demonstrations(self, env_name, task_name):
+        """
+        Return the number of saved demonstrations in the given env/task.
+        """
+        self._ensure_indexed(env_name, task_name)
+        return self.catalog.count(env_name, task_name)
 
     def get_demonstration_list(self, env_name, task_name, page=1, page_size=10):
         """
         Get a list of demonstrations in the given env/task file.
+
+        The list is served from the episode catalog, so the HDF5 file is not
+        opened and a running save does not block it.
         """
-        file_path = self._get_file_path(env_name, task_name)
-        with self._lock:
-            demo_list = []
-            try:
-                with h5py.File(file_path, 'r') as f:
-                    k = list(f.keys())
-                    index = (page - 1) * page_size
-                    for i, timestamp in enumerate(k):
-                        if i < index:
-                            continue
-                        if i >= index + page_size:
-                            break
-                        demo_list.append(timestamp)
-            except FileNotFoundError as e:
-                print(e)
-                return [], 1
-            except KeyError as e:
-                print(e)
-                return [], 1
-            return demo_list, (len(k) - 1) // page_size + 1
-
-            
\ No newline at end of file
+        self._ensure_indexed(env_name, task_name)
+        demo_list = self.catalog.list(env_name, task_name, page, page_size)
+        return demo_list, max(self.catalog.count(env_name, task_name) - 1, 0) // page_size + 1
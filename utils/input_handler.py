@@ -46,7 +46,8 @@ class InputHandler:
         self.mouse_clicked = False
 
     def get_action(self):
-        return self.key_pressed
+        # A copy, as the collection engine reads the keys from another thread.
+        return set(self.key_pressed)
 
     def reset(self):
         self.key_pressed.clear()
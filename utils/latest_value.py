@@ -0,0 +1,49 @@
+import threading
+
+
+class LatestValue:
+    def __init__(self):
+        """
+        Single-slot mailbox holding the most recent value of a producer.
+
+        Publishing never blocks and overwrites the previous value, so a slow
+        consumer skips values instead of making the producer wait. Every
+        value gets a version number, so a polling consumer can tell whether
+        it has already seen it.
+        """
+        self._lock = threading.Lock()
+        self._value = None
+        self._version = 0
+
+    def publish(self, value):
+        """Replace the held value."""
+        with self._lock:
+            self._value = value
+            self._version += 1
+
+    def get(self):
+        """
+        Return the version and the held value.
+
+        Returns
+        -------
+        tuple
+            The version, 0 before anything was published, and the value.
+        """
+        with self._lock:
+            return self._version, self._value
+
+    def get_newer(self, version):
+        """
+        Return the held value if it is newer than `version`.
+
+        Returns
+        -------
+        tuple
+            The current version and the value, or None as the value if
+            nothing newer than `version` was published.
+        """
+        with self._lock:
+            if self._version > version:
+                return self._version, self._value
+            return self._version, None
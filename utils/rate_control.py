@@ -0,0 +1,65 @@
+import time
+
+
+class RateScheduler:
+    def __init__(self, hz):
+        """
+        Schedule a loop at a fixed rate, compensating for the time each
+        iteration takes.
+
+        Deadlines advance by a fixed period from the start instead of from
+        the end of the previous iteration, so the work done in an iteration
+        does not add up to drift. An iteration that ends after the next
+        deadline counts as an overrun. When a whole period is missed, the
+        schedule restarts from the current time instead of running the
+        missed iterations back to back.
+
+        Parameters
+        ----------
+        hz : float
+            The target rate in iterations per second.
+        """
+        self.hz = hz
+        self.period = 1.0 / hz
+        self.start()
+
+    def start(self):
+        """Start a new schedule, with the first deadline now."""
+        self.start_time = time.monotonic()
+        self._deadline = self.start_time
+        self.steps = 0
+        self.overruns = 0
+
+    def tick(self):
+        """
+        Mark the end of an iteration.
+
+        Returns
+        -------
+        float
+            The number of seconds to wait before the next iteration.
+        """
+        self.steps += 1
+        self._deadline += self.period
+        now = time.monotonic()
+        delay = self._deadline - now
+        if delay < 0:
+            self.overruns += 1
+            if -delay > self.period:
+                self._deadline = now
+            delay = 0.0
+        return delay
+
+    def tick_ms(self):
+        """Like `tick`, in whole milliseconds for Tk's ``after``."""
+        return int(round(self.tick() * 1000))
+
+    def elapsed(self):
+        """The number of seconds since the schedule started."""
+        return time.monotonic() - self.start_time
+
+    @property
+    def measured_hz(self):
+        """The average rate achieved since the schedule started."""
+        elapsed = self.elapsed()
+        return self.steps / elapsed if elapsed > 0 else 0.0
@@ -0,0 +1,79 @@
+import threading
+from contextlib import contextmanager
+
+
+class RWLock:
+    def __init__(self):
+        """
+        Reader/writer lock with writer preference.
+
+        Any number of threads may hold the read lock at the same time, the
+        write lock is exclusive. Both are reentrant, and the thread holding
+        the write lock may also take the read lock. Upgrading a read lock to
+        a write lock is not supported.
+        """
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None
+        self._write_count = 0
+        self._waiting_writers = 0
+        self._local = threading.local()
+
+    def acquire_read(self):
+        me = threading.get_ident()
+        held = getattr(self._local, "reads", 0)
+        with self._cond:
+            if self._writer != me and not held:
+                while self._writer is not None or self._waiting_writers:
+                    self._cond.wait()
+            self._readers += 1
+        self._local.reads = held + 1
+
+    def release_read(self):
+        self._local.reads -= 1
+        with self._cond:
+            self._readers -= 1
+            if self._readers == 0:
+                self._cond.notify_all()
+
+    def acquire_write(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._write_count += 1
+                return
+            if getattr(self._local, "reads", 0):
+                raise RuntimeError("Cannot upgrade a read lock to a write lock")
+            self._waiting_writers += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = me
+            self._write_count = 1
+
+    def release_write(self):
+        with self._cond:
+            self._write_count -= 1
+            if self._write_count == 0:
+                self._writer = None
+                self._cond.notify_all()
+
+    @contextmanager
+    def read(self):
+        """Hold the lock for reading inside a ``with`` block."""
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self):
+        """Hold the lock exclusively inside a ``with`` block."""
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
@@ -0,0 +1,102 @@
+import queue
+import threading
+
+
+class SaveQueue:
+    _STOP = object()
+
+    def __init__(self, max_pending=4):
+        """
+        Run demonstration saves one at a time on a background thread.
+
+        Jobs are queued by `submit` and run in order. Their callbacks are not
+        called from the worker thread but from `poll`, so a Tk application
+        can run them on its main loop with ``after``.
+
+        Parameters
+        ----------
+        max_pending : int, optional
+            The maximum number of jobs waiting or running, by default 4.
+        """
+        self._jobs = queue.Queue(maxsize=max_pending)
+        self._done = queue.Queue()
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="SaveQueue", daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self):
+        """The number of jobs waiting or running."""
+        with self._pending_lock:
+            return self._pending
+
+    def submit(self, fn, *args, on_done=None, on_error=None, **kwargs):
+        """
+        Queue a save job.
+
+        Parameters
+        ----------
+        fn : callable
+            The job, called with `args` and `kwargs` on the worker thread.
+        on_done : callable, optional
+            Called by `poll` with the result of the job.
+        on_error : callable, optional
+            Called by `poll` with the exception raised by the job.
+
+        Raises
+        ------
+        queue.Full
+            If `max_pending` jobs are already waiting.
+        """
+        with self._pending_lock:
+            self._jobs.put_nowait((fn, args, kwargs, on_done, on_error))
+            self._pending += 1
+
+    def poll(self):
+        """
+        Call the callbacks of the jobs finished since the last call.
+
+        Returns
+        -------
+        int
+            The number of jobs still waiting or running.
+        """
+        # Read the count first, so every job it no longer counts is in `_done`.
+        pending = self.pending
+        while True:
+            try:
+                callback, value = self._done.get_nowait()
+            except queue.Empty:
+                break
+            if callback is not None:
+                callback(value)
+        return pending
+
+    def close(self, wait=True):
+        """
+        Stop the worker thread once the queued jobs are done.
+
+        Parameters
+        ----------
+        wait : bool, optional
+            Block until the queued jobs are saved, by default True.
+        """
+        self._jobs.put(self._STOP)
+        if wait:
+            self._thread.join()
+            self.poll()
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is self._STOP:
+                return
+            fn, args, kwargs, on_done, on_error = job
+            try:
+                result = (on_done, fn(*args, **kwargs))
+            except Exception as e:
+                result = (on_error, e)
+            with self._pending_lock:
+                self._pending -= 1
+                self._done.put(result)
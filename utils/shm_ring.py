@@ -0,0 +1,200 @@
+import os
+import time
+from multiprocessing import shared_memory
+import numpy as np
+
+
+_ALIGN = 64
+
+
+def _aligned(n):
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def frame_spec(frame):
+    """
+    Return the spec of the frames `FrameRing` transports, from a sample frame.
+
+    Parameters
+    ----------
+    frame : numpy.ndarray or dict
+        A frame as returned by ``task.render()``: one image, or a dict of
+        camera images.
+
+    Returns
+    -------
+    dict
+        Maps each camera to its shape and dtype string. A single image is
+        stored under the key ``""``.
+    """
+    frames = frame if isinstance(frame, dict) else {"": frame}
+    return {key: (tuple(np.shape(value)), np.asarray(value).dtype.str) for key, value in frames.items()}
+
+
+class FrameRing:
+    def __init__(self, spec, n_slots=8, name=None):
+        """
+        Ring buffer of camera frames in shared memory.
+
+        The process stepping the environment writes every frame once with
+        `write`. Other processes attach by name, or by receiving the ring
+        pickled, and read frames as NumPy views of the shared block without
+        copying or pickling them. The display reads the newest frame with
+        `latest`, the episode recorder reads every frame in order with
+        `read` and hands slots back with `release`, so the writer never
+        overwrites a frame it has not recorded yet.
+
+        Parameters
+        ----------
+        spec : dict
+            Maps each camera to its shape and dtype, see `frame_spec`.
+        n_slots : int, optional
+            The number of frames the ring holds, by default 8.
+        name : str, optional
+            Attach to the existing ring with this shared memory name instead
+            of creating one.
+        """
+        self.spec = {key: (tuple(shape), np.dtype(dtype).str) for key, (shape, dtype) in spec.items()}
+        self.n_slots = n_slots
+        header_size = _aligned(8 * (2 + n_slots))
+        self._offsets = {}
+        slot_size = 0
+        for key, (shape, dtype) in self.spec.items():
+            self._offsets[key] = slot_size
+            slot_size += _aligned(int(np.prod(shape)) * np.dtype(dtype).itemsize)
+        self.slot_size = slot_size
+        # Forked children inherit the object, only the creating process owns the ring.
+        self._owner_pid = os.getpid() if name is None else None
+        if self.owner:
+            self._shm = shared_memory.SharedMemory(create=True, size=header_size + slot_size * n_slots)
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+        self.name = self._shm.name
+        # Header: frames written, frames released, and the sequence number held by each slot.
+        self._header = np.ndarray((2 + n_slots,), dtype=np.int64, buffer=self._shm.buf)
+        if self.owner:
+            self._header[:] = 0
+            self._header[2:] = -1
+        self._slots = [
+            {
+                key: np.ndarray(shape, dtype=dtype, buffer=self._shm.buf,
+                                offset=header_size + i * slot_size + self._offsets[key])
+                for key, (shape, dtype) in self.spec.items()
+            }
+            for i in range(n_slots)
+        ]
+
+    def __getstate__(self):
+        return {"spec": self.spec, "n_slots": self.n_slots, "name": self.name}
+
+    def __setstate__(self, state):
+        self.__init__(state["spec"], state["n_slots"], state["name"])
+
+    @property
+    def owner(self):
+        """True in the process that created the ring."""
+        return self._owner_pid == os.getpid()
+
+    @property
+    def written(self):
+        """The number of frames written so far."""
+        return int(self._header[0])
+
+    @property
+    def released(self):
+        """The number of frames handed back by `release`."""
+        return int(self._header[1])
+
+    def write(self, frame, timeout=None, track_release=True):
+        """
+        Copy a frame into the next slot.
+
+        Parameters
+        ----------
+        frame : numpy.ndarray or dict
+            The frame, matching the spec of the ring.
+        timeout : float, optional
+            How long to wait for the recorder to release a slot, forever by
+            default.
+        track_release : bool, optional
+            Wait until the slot to overwrite was released. Pass False when
+            only the newest frame matters, by default True.
+
+        Returns
+        -------
+        int
+            The sequence number of the written frame.
+
+        Raises
+        ------
+        TimeoutError
+            If no slot was released within `timeout`.
+        """
+        seq = self.written
+        if track_release:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while seq - self.released >= self.n_slots:
+                if deadline is not None and time.monotonic() > deadline:
+                    raise TimeoutError("No frame slot was released in time")
+                time.sleep(0.0005)
+        slot = seq % self.n_slots
+        frames = frame if isinstance(frame, dict) else {"": frame}
+        self._header[2 + slot] = -1
+        for key, view in self._slots[slot].items():
+            np.copyto(view, frames[key], casting="unsafe")
+        self._header[2 + slot] = seq
+        self._header[0] = seq + 1
+        return seq
+
+    def read(self, seq):
+        """
+        Return views of frame `seq`.
+
+        The views stay valid until the slot is released and overwritten.
+
+        Returns
+        -------
+        numpy.ndarray or dict
+            The frame in the layout it was written with.
+
+        Raises
+        ------
+        IndexError
+            If the frame was not written yet or was already overwritten.
+        """
+        slot = seq % self.n_slots
+        if seq >= self.written or self._header[2 + slot] != seq:
+            raise IndexError(f"Frame {seq} is not in the ring")
+        views = self._slots[slot]
+        return views[""] if "" in views else dict(views)
+
+    def latest(self):
+        """
+        Return the sequence number and views of the newest frame.
+
+        Returns
+        -------
+        tuple
+            The sequence number and the frame, or ``(-1, None)`` before the
+            first write.
+        """
+        seq = self.written - 1
+        if seq < 0:
+            return -1, None
+        return seq, self.read(seq)
+
+    def release(self, seq):
+        """Hand frames up to and including `seq` back to the writer."""
+        self._header[1] = max(self.released, seq + 1)
+
+    def close(self):
+        """Detach from the ring. The creating process also frees it."""
+        self._header = None
+        self._slots = []
+        try:
+            self._shm.close()
+        except BufferError:
+            # Views handed out are still alive, the mapping goes away with them.
+            pass
+        if self.owner:
+            self._shm.unlink()
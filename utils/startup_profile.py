@@ -0,0 +1,114 @@
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+
+# The modules are imported from the repository root, wherever the profiler is run from.
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def profile_imports(modules):
+    """
+    Measure the cold import time of modules with ``python -X importtime``.
+
+    The modules are imported in a fresh interpreter, so nothing is cached by
+    the calling process.
+
+    Parameters
+    ----------
+    modules : list of str
+        The modules to import.
+
+    Returns
+    -------
+    dict
+        ``total_s``, the cumulative time of the requested modules,
+        ``by_package``, the self time and number of modules of every top
+        level package, slowest first, and ``modules``, the self and
+        cumulative time of every imported module, slowest first.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {', '.join(modules)}"],
+                            capture_output=True, text=True, cwd=_REPO_ROOT)
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        entries.append((fields[2].strip(), int(fields[0]) / 1e6, int(fields[1]) / 1e6))
+    by_package = {}
+    for name, self_s, _ in entries:
+        package = by_package.setdefault(name.split(".")[0], {"self_s": 0.0, "modules": 0})
+        package["self_s"] += self_s
+        package["modules"] += 1
+    report = {
+        "total_s": sum(cumulative for name, _, cumulative in entries if name in modules),
+        "by_package": dict(sorted(by_package.items(), key=lambda item: -item[1]["self_s"])),
+        "modules": [{"module": name, "self_s": self_s, "cumulative_s": cumulative}
+                    for name, self_s, cumulative in sorted(entries, key=lambda entry: -entry[2])],
+    }
+    if result.returncode != 0:
+        report["error"] = result.stderr.strip().splitlines()[-1]
+    return report
+
+
+class StartupProfiler:
+    def __init__(self, path, start_time=None):
+        """
+        Collect the timings of the application startup into a JSON report.
+
+        Phases are timed with `phase`, the first frame after a demonstration
+        is started with `first_frame`. The report is written by `write`, so
+        reports of two releases can be diffed.
+
+        Parameters
+        ----------
+        path : str
+            The path of the JSON report.
+        start_time : float, optional
+            The `time.perf_counter` value at which the startup began, e.g.
+            before the imports of the entry point, by default now.
+        """
+        self.path = path
+        self.start_time = time.perf_counter() if start_time is None else start_time
+        self.report = {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "phases": {},
+            "first_frame": None,
+        }
+
+    @contextmanager
+    def phase(self, name):
+        """Time the enclosed block as phase `name`, in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.report["phases"][name] = time.perf_counter() - start
+
+    def mark(self, name):
+        """Record the seconds since the startup began as phase `name`."""
+        self.report["phases"][name] = time.perf_counter() - self.start_time
+
+    def first_frame(self, env_name, task_name, latency):
+        """
+        Record the latency between starting the first demonstration and
+        showing its first frame, and write the report. Later demonstrations
+        are ignored.
+        """
+        if self.report["first_frame"] is not None:
+            return
+        self.report["first_frame"] = {"env": env_name, "task": task_name, "latency_s": latency}
+        self.write()
+
+    def write(self):
+        """Write the report to `path`."""
+        with open(self.path, "w") as f:
+            json.dump(self.report, f, indent=2)